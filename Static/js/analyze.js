@@ -60,50 +60,7 @@ async function runAnalysis() {
 
         const data = await response.json();
 
-        let resultHTML = `
-            <div class="result-header">
-                <span class="checkmark">✅</span>
-                <strong>Рекомендация готова!</strong>
-            </div>
-            <div class="result-container">
-                <h3>🎯 Основная рекомендация:</h3>
-                <div class="main-recommendation">
-                    <div class="sport-name">${data.sport}</div>
-                    <div class="confidence">Уверенность: ${data.confidence}%</div>
-                    <div class="reason">${data.reason || ""}</div>
-                </div>
-        `;
-
-        // 🔥 Добавляем альтернативные варианты, если они есть
-        if (data.additional_recommendations && data.additional_recommendations.length > 0) {
-            resultHTML += `
-                <div class="alternative-recommendations">
-                    <h4>🔄 Альтернативные варианты:</h4>
-                    <div class="alternatives-list">
-            `;
-            data.additional_recommendations.forEach((rec, index) => {
-                resultHTML += `
-                    <div class="alternative-item">
-                        <span class="alt-sport">${index + 1}. ${rec.sport}</span>
-                        <span class="alt-confidence">${rec.confidence}%</span>
-                    </div>
-                `;
-            });
-            resultHTML += `
-                    </div>
-                </div>
-            `;
-        }
-
-        resultHTML += `</div>`;
-        resultDiv.innerHTML = resultHTML;
-        resultDiv.style.display = "block";
-
-        // Плавное появление
-        setTimeout(() => {
-            resultDiv.style.transition = "opacity 0.5s ease";
-            resultDiv.style.opacity = "1";
-        }, 50);
+        renderResult(resultDiv, data);
 
     } catch (error) {
         console.error("Ошибка запроса:", error);
@@ -126,4 +83,167 @@ async function runAnalysis() {
             btn.textContent = originalBtnText;
         }
     }
-}
\ No newline at end of file
+}
+
+// Отрисовка рекомендации (общая для кнопки и живого анализа)
+function renderResult(resultDiv, data) {
+    let resultHTML = `
+        <div class="result-header">
+            <span class="checkmark">✅</span>
+            <strong>Рекомендация готова!</strong>
+        </div>
+        <div class="result-container">
+            <h3>🎯 Основная рекомендация:</h3>
+            <div class="main-recommendation">
+                <div class="sport-name">${data.sport}</div>
+                <div class="confidence">Уверенность: ${data.confidence}%</div>
+                <div class="reason">${data.reason || ""}</div>
+            </div>
+    `;
+
+    // 🔥 Добавляем альтернативные варианты, если они есть
+    if (data.additional_recommendations && data.additional_recommendations.length > 0) {
+        resultHTML += `
+            <div class="alternative-recommendations">
+                <h4>🔄 Альтернативные варианты:</h4>
+                <div class="alternatives-list">
+        `;
+        data.additional_recommendations.forEach((rec, index) => {
+            resultHTML += `
+                <div class="alternative-item">
+                    <span class="alt-sport">${index + 1}. ${rec.sport}</span>
+                    <span class="alt-confidence">${rec.confidence}%</span>
+                </div>
+            `;
+        });
+        resultHTML += `
+                </div>
+            </div>
+        `;
+    }
+
+    resultHTML += `</div>`;
+    resultDiv.innerHTML = resultHTML;
+    resultDiv.style.display = "block";
+
+    // Плавное появление
+    setTimeout(() => {
+        resultDiv.style.transition = "opacity 0.5s ease";
+        resultDiv.style.opacity = "1";
+    }, 50);
+}
+
+// Живой анализ по мере набора: на сервер уходят только правки текста,
+// а сервер пересчитывает рекомендацию по затронутым словам.
+// Включается атрибутом data-live-analysis (LIVE_ANALYSIS=1 на сервере).
+const LIVE_ANALYSIS_DELAY_MS = 400;
+
+function computeEdit(oldChars, newChars) {
+    // Общие начало и конец строк; позиции — в символах Unicode, как на сервере
+    let start = 0;
+    while (start < oldChars.length && start < newChars.length && oldChars[start] === newChars[start]) {
+        start++;
+    }
+    let oldEnd = oldChars.length;
+    let newEnd = newChars.length;
+    while (oldEnd > start && newEnd > start && oldChars[oldEnd - 1] === newChars[newEnd - 1]) {
+        oldEnd--;
+        newEnd--;
+    }
+    return { start, end: oldEnd, text: newChars.slice(start, newEnd).join("") };
+}
+
+function setupLiveAnalysis(inputField, resultDiv) {
+    let session = null;
+    let sentChars = [];
+    let timer = null;
+    let inFlight = false;
+
+    async function startSession(text) {
+        const response = await fetch("/api/analyze/session", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ text })
+        });
+        if (!response.ok) {
+            // Например, текст длиннее лимита: сессии нет, попробуем при следующей правке
+            return null;
+        }
+        const data = await response.json();
+        session = { id: data.session_id, version: data.version };
+        return data.result;
+    }
+
+    function deleteSession(id) {
+        // keepalive — запрос доходит, даже если страница уже закрывается
+        fetch(`/api/analyze/session/${id}`, { method: "DELETE", keepalive: true }).catch(() => {});
+    }
+
+    async function sendEdit(edit) {
+        const response = await fetch(`/api/analyze/session/${session.id}`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ version: session.version, edits: [edit] })
+        });
+        if (!response.ok) {
+            // Сессия истекла или разошлась с клиентом — удаляем её и начинаем заново с полным текстом
+            deleteSession(session.id);
+            session = null;
+            return null;
+        }
+        const data = await response.json();
+        session.version = data.version;
+        return data.result;
+    }
+
+    async function sync() {
+        if (inFlight) {
+            schedule();
+            return;
+        }
+        inFlight = true;
+        const text = inputField.value;
+        const chars = Array.from(text);
+        try {
+            let result = null;
+            if (session) {
+                result = await sendEdit(computeEdit(sentChars, chars));
+            }
+            if (!session) {
+                result = await startSession(text);
+            }
+            sentChars = chars;
+            if (result && !result.error) {
+                renderResult(resultDiv, result);
+            }
+        } catch (error) {
+            console.error("Ошибка живого анализа:", error);
+            if (session) deleteSession(session.id);
+            session = null;
+        } finally {
+            inFlight = false;
+        }
+    }
+
+    function schedule() {
+        clearTimeout(timer);
+        timer = setTimeout(sync, LIVE_ANALYSIS_DELAY_MS);
+    }
+
+    inputField.addEventListener("input", schedule);
+    window.addEventListener("pagehide", () => {
+        clearTimeout(timer);
+        if (session) {
+            deleteSession(session.id);
+            session = null;
+        }
+    });
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    const inputField = document.getElementById('reportInput');
+    const resultDiv = document.getElementById('result');
+    if (inputField && resultDiv && inputField.dataset.liveAnalysis !== undefined) {
+        setupLiveAnalysis(inputField, resultDiv);
+    }
+});
@@ -1,106 +1,359 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template
+import copy
+import hashlib
 import re
-from sport_rules import SPORT_RULES
-from config import PROJECT_PROGRESS
-import pymorphy3
-from synonyms import SYNONYM_GROUPS
+import secrets
+import signal
+import threading
+import time
+from cache import TTLCache
+from config import (
+    PROJECT_PROGRESS, MAX_BATCH_SIZE, ANALYSIS_WORKERS, ANALYSIS_START_METHOD, ANALYSIS_MAX_RESTARTS,
+    RESULT_CACHE_SIZE, RESULT_CACHE_TTL, METRICS_ENABLED, MATCHER_MODE, SESSION_TTL, SESSION_MAX,
+    ADMIN_TOKEN, RULES_WATCH_INTERVAL, MAX_TEXT_BYTES, MAX_TEXT_TOKENS, TEXT_LIMIT_MODE, MAX_REQUEST_BYTES,
+    WARM_UP_MODE, WARM_UP_CORPUS, LIVE_ANALYSIS,
+)
+from engine import AnalysisEngine
+from incremental import IncrementalSession, TextLimitError
+from knowledge_base import compute_source_hash, load_knowledge_base
+from lemmatizer import LEMMA_CACHE, get_morph, lemmatize_word, normalize_phrase
+from metrics import Metrics, TIME_BUCKETS, SIZE_BUCKETS, COUNT_BUCKETS
+from reloader import RulesReloader
 
 # === Инициализация ===
-morph = pymorphy3.MorphAnalyzer()
+# Нормализованные синонимы, индекс и веса берутся из готового артефакта.
+# И база, и MorphAnalyzer загружаются лениво, поэтому импорт app.py и
+# статические страницы не ждут словарей; заранее их грузит warm_up_worker().
+KB = None
+_kb_lock = threading.Lock()
+
+def get_knowledge_base():
+    """Текущая база знаний; при первом обращении загружается (или пересобирается) с диска."""
+    if KB is None:
+        with _kb_lock:
+            if KB is None:
+                set_knowledge_base(load_knowledge_base())
+    return KB
+
+def set_knowledge_base(kb):
+    global KB
+    KB = kb
+
+# В режиме sequence концепты ищет автомат по последовательности лемм, и тогда
+# во все этапы передаётся кортеж лемм в порядке текста, а не множество.
+SEQUENCE_MODE = MATCHER_MODE == "sequence"
+
+# В режимах compact и bitset найденные концепты передаются в подсчёт баллов
+# номерами столбцов SportScorer, без обратного перевода в строки.
+ID_MODE = MATCHER_MODE in ("compact", "bitset")
+
+# Ответ зависит только от множества лемм, поэтому тексты, отличающиеся лишь
+# пунктуацией, регистром или порядком слов, получают ответ из кэша.
+RESULT_CACHE = TTLCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+
+# Сессии живого набора текста (см. incremental.py); хранятся в памяти процесса,
+# поэтому при нескольких воркерах балансировщик должен держать сессию на одном
+# воркере (см. LIVE_ANALYSIS в config.py)
+SESSIONS = TTLCache(SESSION_MAX, SESSION_TTL)
+
+# === Метрики (отдаются на /metrics) ===
+METRICS = Metrics(enabled=METRICS_ENABLED)
+METRICS.histogram("stage_seconds", "Длительность этапов анализа в секундах", TIME_BUCKETS, label="stage")
+METRICS.histogram("request_bytes", "Размер анализируемого текста в байтах", SIZE_BUCKETS)
+METRICS.histogram("request_tokens", "Число слов в анализируемом тексте", COUNT_BUCKETS)
+METRICS.histogram("matched_concepts", "Число найденных концептов на текст", COUNT_BUCKETS)
+METRICS.counter("analyzed_texts_total", "Тексты, переданные в анализ")
+METRICS.counter("rejected_texts_total", "Тексты, отклонённые как неосмысленные")
+for _name, _cache in (("lemma_cache", LEMMA_CACHE), ("result_cache", RESULT_CACHE)):
+    METRICS.gauge(f"{_name}_hits", "Попадания в кэш", lambda c=_cache: c.hits)
+    METRICS.gauge(f"{_name}_misses", "Промахи кэша", lambda c=_cache: c.misses)
+    METRICS.gauge(f"{_name}_hit_ratio", "Доля попаданий в кэш", lambda c=_cache: c.stats()["hit_ratio"])
+    METRICS.gauge(f"{_name}_size", "Записей в кэше", lambda c=_cache: len(c))
+METRICS.gauge("warm_up_seconds", "Длительность прогрева в секундах", lambda: WARM_UP_STATUS["seconds"] or 0)
 
 # === ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ===
 
-def normalize_phrase(phrase):
-    """Превращает фразу в множество лемм."""
-    words = re.findall(r'[а-яё]+', phrase.lower())
-    lemmas = set()
-    for word in words:
-        parsed = morph.parse(word)
-        if parsed:
-            lemma = parsed[0].normal_form
-            lemmas.add(lemma)
-    return lemmas
-
-# === Предварительная обработка синонимов ===
-NORMALIZED_SYNONYMS = {}
-for concept, phrases in SYNONYM_GROUPS.items():
-    normalized_phrases = []
-    for phrase in phrases:
-        normalized_phrases.append(normalize_phrase(phrase))
-    NORMALIZED_SYNONYMS[concept] = normalized_phrases
+WORD_RE = re.compile(r'[а-яё]+')
 
 def is_meaningful_text(text):
     """Проверяет, похож ли текст на осмысленное описание характера."""
-    if len(text) < 20:
-        return False
-    russian_words = re.findall(r'[а-яё]{3,}', text.lower())
-    return len(russian_words) >= 3
+    return is_meaningful(text, scan_text(text)[1])
+
+def is_meaningful(text, long_words):
+    """То же по готовому числу слов от трёх букв (см. scan_text)."""
+    return len(text) >= 20 and long_words >= 3
+
+def tokenize(text):
+    """Русские слова текста в нижнем регистре."""
+    return WORD_RE.findall(text.lower())
+
+def scan_text(text, max_tokens=None):
+    """Один проход по тексту для проверки осмысленности и лемматизации.
+
+    Возвращает (слова, число слов от трёх букв, обрезан ли текст). Слова
+    читаются по одному, поэтому после max_tokens слов хвост текста не разбирается.
+    """
+    words = []
+    long_words = 0
+    for match in WORD_RE.finditer(text.lower()):
+        if max_tokens is not None and len(words) >= max_tokens:
+            return words, long_words, True
+        word = match.group()
+        words.append(word)
+        if len(word) >= 3:
+            long_words += 1
+    return words, long_words, False
+
+def limit_text_bytes(text):
+    """Обрезает текст до MAX_TEXT_BYTES байт UTF-8: (текст, обрезан ли). None вместо текста — отказ."""
+    # В UTF-8 символ занимает не больше 4 байт, короткие тексты не кодируем
+    if len(text) * 4 <= MAX_TEXT_BYTES:
+        return text, False
+    encoded = text.encode("utf-8")
+    if len(encoded) <= MAX_TEXT_BYTES:
+        return text, False
+    if TEXT_LIMIT_MODE != "truncate":
+        return None, True
+    return encoded[:MAX_TEXT_BYTES].decode("utf-8", "ignore"), True
 
 def lemmatize_text_to_set(text):
     """Превращает текст в множество лемм (без пунктуации и регистра)."""
-    words = re.findall(r'[а-яё]+', text.lower())
+    return lemmatize_words(tokenize(text))
+
+def lemmatize_words(words):
+    """Множество лемм для уже выделенных слов; повторы разбираются один раз."""
     lemmas = set()
-    for word in words:
-        parsed = morph.parse(word)
-        if parsed:
-            lemma = parsed[0].normal_form
+    for word in set(words):
+        lemma = lemmatize_word(word)
+        if lemma:
             lemmas.add(lemma)
     return lemmas
 
-def expand_text_with_synonyms(user_lemmas, normalized_synonyms):
-    """Сравнивает леммы пользователя с нормализованными фразами."""
-    matched_concepts = set()
-    for concept, phrase_lemmas_list in normalized_synonyms.items():
-        for phrase_lemmas in phrase_lemmas_list:
-            if phrase_lemmas.issubset(user_lemmas):
-                matched_concepts.add(concept)
-                break
-    return matched_concepts
+def lemmatize_words_to_sequence(words):
+    """Леммы слов в порядке текста (для режима sequence); повторы разбираются один раз."""
+    lemma_by_word = {word: lemmatize_word(word) for word in set(words)}
+    return tuple(lemma_by_word[word] for word in words if lemma_by_word[word])
+
+def lemmatize_texts_to_sequences(texts):
+    """Леммы пачки текстов в порядке слов: каждое уникальное слово разбирается один раз на всю пачку."""
+    return lemmatize_word_lists([tokenize(text) for text in texts])
+
+def lemmatize_word_lists(words_per_text):
+    """Леммы для нескольких списков слов: каждое уникальное слово разбирается один раз."""
+    lemma_by_word = {}
+    for words in words_per_text:
+        for word in words:
+            if word not in lemma_by_word:
+                lemma_by_word[word] = lemmatize_word(word)
+    return [
+        tuple(lemma_by_word[word] for word in words if lemma_by_word[word])
+        for words in words_per_text
+    ]
+
+def expand_text_with_synonyms(user_lemmas, concept_matcher):
+    """Сравнивает леммы пользователя с нормализованными фразами.
+
+    concept_matcher — обратный индекс (множество лемм) или автомат (последовательность лемм).
+    """
+    return concept_matcher.match(user_lemmas)
+
+def expand_texts_with_synonyms(lemma_sets, concept_matcher):
+    """То же для нескольких текстов; битовый движок проверяет их все за один проход."""
+    match_many = getattr(concept_matcher, "match_many", None)
+    if match_many is not None:
+        return match_many(lemma_sets)
+    return [expand_text_with_synonyms(user_lemmas, concept_matcher) for user_lemmas in lemma_sets]
 
 # === Анализ текста ===
-def analyze_with_rules(text):
-    if not is_meaningful_text(text):
-        return {"error": "Текст слишком короткий или не содержит описания характера."}
-
-    user_lemmas = lemmatize_text_to_set(text)
-    user_concepts = expand_text_with_synonyms(user_lemmas, NORMALIZED_SYNONYMS)
+NOT_MEANINGFUL_ERROR = "Текст слишком короткий или не содержит описания характера."
+EMPTY_TEXT_ERROR = "Пожалуйста, введите описание характера."
+TEXT_TOO_LONG_ERROR = f"Текст слишком длинный (максимум {MAX_TEXT_BYTES} байт и {MAX_TEXT_TOKENS} слов)."
+
+def prepare_text(text):
+    """Ограничения размера и разбор на слова: (слова, число длинных слов, обрезан ли) или ошибка.
+
+    В режиме reject лимит слов проверяется по первым MAX_TEXT_TOKENS + 1 словам.
+    """
+    text, truncated = limit_text_bytes(text)
+    if text is None:
+        return {"error": TEXT_TOO_LONG_ERROR}
+    words, long_words, over_limit = scan_text(text, MAX_TEXT_TOKENS)
+    if over_limit and TEXT_LIMIT_MODE != "truncate":
+        return {"error": TEXT_TOO_LONG_ERROR}
+    if not is_meaningful(text, long_words):
+        return {"error": NOT_MEANINGFUL_ERROR}
+    return words, truncated or over_limit
+
+def analyze_with_rules(text, explain=False):
+    """Анализ одного текста; explain=True добавляет в ответ explanation (см. analyze_concept_sets)."""
+    METRICS.inc("analyzed_texts_total")
+    if METRICS.enabled:
+        METRICS.observe("request_bytes", len(text.encode("utf-8")))
+
+    with METRICS.timer("tokenize"):
+        prepared = prepare_text(text)
+    if isinstance(prepared, dict):
+        METRICS.inc("rejected_texts_total")
+        return prepared
+    words, truncated = prepared
+
+    METRICS.observe("request_tokens", len(words))
+    with METRICS.timer("lemmatize"):
+        if SEQUENCE_MODE:
+            user_lemmas = lemmatize_words_to_sequence(words)
+        else:
+            user_lemmas = lemmatize_words(words)
+    result = analyze_lemmas(user_lemmas, explain)
+    if truncated:
+        result["truncated"] = True
+    return result
+
+def analyze_batch_with_rules(texts, explain=False):
+    """То же, что /api/analyze для каждого элемента пачки, но с общей лемматизацией.
+
+    Ошибки отдельных элементов не прерывают пачку и возвращаются на своих местах.
+    """
+    results = [None] * len(texts)
+    meaningful = []
+    for i, text in enumerate(texts):
+        text = text.strip() if isinstance(text, str) else ''
+        prepared = prepare_text(text) if text else {"error": EMPTY_TEXT_ERROR}
+        if isinstance(prepared, dict):
+            results[i] = prepared
+        else:
+            meaningful.append((i, prepared))
+
+    # Одна и та же база на всю пачку, даже если её заменят во время анализа
+    kb = get_knowledge_base()
+    METRICS.inc("analyzed_texts_total", len(texts))
+    METRICS.inc("rejected_texts_total", len(texts) - len(meaningful))
+    with METRICS.timer("lemmatize_batch"):
+        lemma_sets = lemmatize_word_lists([words for _, (words, _) in meaningful])
+        if not SEQUENCE_MODE:
+            lemma_sets = [set(sequence) for sequence in lemma_sets]
+    missed = []
+    for (i, _), user_lemmas in zip(meaningful, lemma_sets):
+        key = result_cache_key(user_lemmas, kb, explain)
+        cached = RESULT_CACHE.get(key)
+        if cached is not None:
+            results[i] = copy.deepcopy(cached)
+        else:
+            missed.append((i, key, user_lemmas))
+
+    with METRICS.timer("match"):
+        matches = match_concepts([lemmas for _, _, lemmas in missed], kb)
+    for concepts in matches:
+        METRICS.observe("matched_concepts", len(concepts))
+    with METRICS.timer("score"):
+        analyzed = score_matches(matches, kb, explain)
+    for (i, key, _), result in zip(missed, analyzed):
+        RESULT_CACHE.put(key, copy.deepcopy(result))
+        results[i] = result
+    for i, (_, truncated) in meaningful:
+        if truncated:
+            results[i]["truncated"] = True
+    return results
+
+def concept_matcher(kb):
+    """Индекс или автомат базы kb; база строит только структуру своего MATCHER_MODE."""
+    return kb.matcher
+
+def match_concepts(lemma_sets, kb):
+    """Найденные концепты каждого текста: номера в режимах compact и bitset, иначе имена."""
+    matcher = concept_matcher(kb)
+    if not ID_MODE:
+        return expand_texts_with_synonyms(lemma_sets, matcher)
+    match_ids_many = getattr(matcher, "match_ids_many", None)
+    if match_ids_many is not None:
+        return match_ids_many(lemma_sets)
+    return [matcher.match_ids(user_lemmas) for user_lemmas in lemma_sets]
+
+def score_matches(matches, kb, explain=False):
+    """Ответы по результатам match_concepts."""
+    if ID_MODE:
+        return analyze_concept_ids(matches, kb, explain)
+    return analyze_concept_sets(matches, kb, explain)
+
+def result_cache_key(user_lemmas, kb, explain=False):
+    """Хэш отсортированных лемм вместе с хэшем исходников базы знаний (новые правила — новые ключи).
+
+    В режиме sequence ответ зависит от порядка слов, поэтому леммы не сортируются.
+    Ответы с explanation кэшируются отдельно.
+    """
+    digest = hashlib.blake2b(kb.source_hash.encode(), digest_size=16)
+    lemmas = user_lemmas if SEQUENCE_MODE else sorted(user_lemmas)
+    digest.update(MATCHER_MODE.encode())
+    if explain:
+        digest.update(b"explain")
+    digest.update("\n".join(lemmas).encode())
+    return digest.digest()
+
+def analyze_lemmas(user_lemmas, explain=False):
+    """Подбирает виды спорта по готовому множеству лемм."""
+    kb = get_knowledge_base()
+    key = result_cache_key(user_lemmas, kb, explain)
+    cached = RESULT_CACHE.get(key)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    with METRICS.timer("match"):
+        matches = match_concepts([user_lemmas], kb)
+    METRICS.observe("matched_concepts", len(matches[0]))
+    with METRICS.timer("score"):
+        result = score_matches(matches, kb, explain)[0]
+    RESULT_CACHE.put(key, copy.deepcopy(result))
+    return result
+
+def analyze_concept_sets(concept_sets, kb, explain=False):
+    """Оценивает сразу несколько наборов концептов одним матричным умножением.
+
+    С explain=True каждый ответ получает explanation: найденные концепты и для
+    каждого вида спорта из ответа — веса концептов и поправку модификаторов.
+    Всё берётся из тех же матриц, что и баллы, без повторного поиска.
+    """
+    return score_concept_matrix(kb.scorer.concept_matrix(concept_sets), kb, concept_sets if explain else None)
+
+def analyze_concept_ids(id_sets, kb, explain=False):
+    """То же по номерам концептов из match_ids (режимы compact и bitset)."""
+    matched_concepts = None
+    if explain:
+        names = concept_matcher(kb).concepts
+        matched_concepts = [{names[i] for i in ids} for ids in id_sets]
+    return score_concept_matrix(kb.scorer.id_matrix(id_sets), kb, matched_concepts)
+
+def score_concept_matrix(concept_matrix, kb, matched_concepts=None):
+    """Баллы, уверенность и ответы по матрице «запрос × концепт».
+
+    matched_concepts — имена найденных концептов для explanation; None — без него.
+    """
+    scorer = kb.scorer
 
     # 1. Считаем базовые баллы
-    scores = {}
-    for sport, rule in SPORT_RULES.items():
-        total_weight = 0
-        keywords = rule.get("keywords", {})
-        for concept, weight in keywords.items():
-            if concept in user_concepts:
-                total_weight += weight
-        scores[sport] = total_weight
-
-    # 2. Применяем НЕГАТИВНЫЕ МАРКЕРЫ (если есть)
-    if "потребность_в_одобрении" in user_concepts:
-        scores["Плавание🏊"] = max(0, scores.get("Плавание🏊", 0) - 15)
-
-    # 3. Сортируем по убыванию баллов (для последующего расчёта)
-    sorted_sports = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-
-    # === НОВАЯ ЛОГИКА: формируем рекомендации с confidence и сортируем по ней ===
-    all_recommendations = []
-    for sport, score in sorted_sports:
-        if score <= 0:
-            continue
-        rule = SPORT_RULES[sport]
-        keywords = rule.get("keywords", {})
-        max_possible = sum(keywords.values()) if keywords else 1
-        # Рассчитываем уверенность как процент от максимума
-        conf = min(95, max(50, int((score / max_possible) * 100)))
-        reason = rule.get("reason", "")
-        all_recommendations.append({
-            "sport": sport,
-            "confidence": conf,
-            "reason": reason
-        })
-
+    base_scores = scorer.score(concept_matrix)
+
+    # 2. Применяем модификаторы SCORE_MODIFIERS: штрафы, бонусы и сочетания концептов
+    scores = scorer.modify(concept_matrix, base_scores)
+
+    # 3. Уверенность и тройка лучших: по confidence, при равенстве — по баллам
+    confidences = scorer.confidences(scores)
+    rankings = scorer.rank(scores, confidences)
+
+    results = [
+        build_result(scorer, ranked, row_confidences)
+        for ranked, row_confidences in zip(rankings, confidences)
+    ]
+    if matched_concepts is not None:
+        for i, result in enumerate(results):
+            result["explanation"] = {
+                "matched_concepts": sorted(matched_concepts[i]),
+                "sports": scorer.explain(concept_matrix[i], base_scores[i], scores[i], confidences[i], rankings[i]),
+            }
+    return results
+
+def build_result(scorer, ranked, confidences):
+    """Собирает ответ API из индексов лучших видов спорта."""
     # Если нет подходящих видов
-    if not all_recommendations:
+    if len(ranked) == 0:
         return {
             "sport": "Универсальный спорт (например, плавание)",
             "confidence": 60,
@@ -108,22 +361,134 @@ def analyze_with_rules(text):
             "additional_recommendations": []
         }
 
-    # 🔥 СОРТИРУЕМ ПО УВЕРЕННОСТИ (confidence)!
-    all_recommendations.sort(key=lambda x: x["confidence"], reverse=True)
-
-    main = all_recommendations[0]
-    alternatives = all_recommendations[1:3]
+    main, alternatives = ranked[0], ranked[1:]
 
     return {
-        "sport": main["sport"],
-        "confidence": main["confidence"],
-        "reason": main["reason"],
+        "sport": scorer.sports[main],
+        "confidence": int(confidences[main]),
+        "reason": scorer.reasons[main],
         "additional_recommendations": [
-            {"sport": alt["sport"], "confidence": alt["confidence"]}
+            {"sport": scorer.sports[alt], "confidence": int(confidences[alt])}
             for alt in alternatives
         ]
     }
 
+def analyze_session(session):
+    """Ответ в формате /api/analyze по текущему состоянию инкрементальной сессии."""
+    if not session.is_meaningful:
+        return {"error": NOT_MEANINGFUL_ERROR}
+    return analyze_concept_sets([session.concepts], get_knowledge_base())[0]
+
+# Прогрев: процесс готов к анализу, когда загружены база знаний и словари pymorphy3
+# и через анализ прогнан корпус WARM_UP_CORPUS. Корпус прогоняется мимо метрик
+# и RESULT_CACHE: его тексты не приходят от пользователей, и ответы на них
+# только занимали бы место в кэше. Заполняется LEMMA_CACHE — ради этого прогрев
+# и нужен, — а его счётчики попаданий после прогрева обнуляются.
+WARM_UP_STATUS = {"state": "cold", "error": None, "seconds": None, "replayed": 0}
+_warm_up_lock = threading.Lock()
+_warm_up_thread = None
+
+def read_warm_up_corpus(path=WARM_UP_CORPUS):
+    """Описания для прогрева, по одному в строке; нет файла — пустой список."""
+    if not path:
+        return []
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    except FileNotFoundError:
+        app.logger.warning("Корпус для прогрева не найден: %s", path)
+        return []
+
+def warm_up_worker():
+    """Загружает базу знаний и словари pymorphy3 и прогоняет корпус прогрева заранее, а не на первом запросе."""
+    WARM_UP_STATUS.update(state="warming", error=None)
+    start = time.perf_counter()
+    try:
+        get_knowledge_base()
+        get_morph()
+        corpus = read_warm_up_corpus()
+        for text in corpus:
+            replay_warm_up_text(text)
+        LEMMA_CACHE.reset_stats()
+    except Exception as e:
+        WARM_UP_STATUS.update(state="failed", error=str(e))
+        raise
+    seconds = time.perf_counter() - start
+    WARM_UP_STATUS.update(state="ready", seconds=round(seconds, 3), replayed=len(corpus))
+    app.logger.info("Прогрев занял %.2f с, прогнано текстов: %d", seconds, len(corpus))
+
+def replay_warm_up_text(text):
+    """Те же этапы, что в analyze_with_rules, но без метрик и RESULT_CACHE."""
+    prepared = prepare_text(text)
+    if isinstance(prepared, dict):
+        return
+    words, _ = prepared
+    user_lemmas = lemmatize_words_to_sequence(words) if SEQUENCE_MODE else lemmatize_words(words)
+    kb = get_knowledge_base()
+    score_matches(match_concepts([user_lemmas], kb), kb)
+
+def start_warm_up():
+    """Прогревает процесс в фоновом потоке; повторный вызов во время прогрева ничего не делает.
+
+    Вызывать после fork: поток, запущенный в мастере gunicorn, не доживёт до воркеров.
+    """
+    global _warm_up_thread
+    with _warm_up_lock:
+        if WARM_UP_STATUS["state"] == "ready":
+            return
+        if _warm_up_thread is not None and _warm_up_thread.is_alive():
+            return
+        _warm_up_thread = threading.Thread(target=_warm_up_in_background, name="warm-up", daemon=True)
+        _warm_up_thread.start()
+
+def _warm_up_in_background():
+    try:
+        warm_up_worker()
+    except Exception:
+        app.logger.exception("Прогрев не удался")
+
+ENGINE = AnalysisEngine(
+    analyze_with_rules,
+    analyze_batch_with_rules,
+    warm_up=warm_up_worker,
+    workers=ANALYSIS_WORKERS,
+    start_method=ANALYSIS_START_METHOD,
+    max_restarts=ANALYSIS_MAX_RESTARTS,
+)
+
+# === Горячая перезагрузка правил ===
+def install_knowledge_base(kb):
+    """Подменяет базу знаний одним присваиванием и сбрасывает всё, что от неё зависит."""
+    set_knowledge_base(kb)
+    RESULT_CACHE.clear()
+    # Клиенты живого анализа получат 404 и начнут сессию заново уже с новыми правилами
+    SESSIONS.clear()
+    # Воркеры пула держат свою копию базы — пересоздаём пул
+    ENGINE.restart()
+
+RELOADER = RulesReloader(get_knowledge_base, install_knowledge_base)
+
+def start_rules_watcher():
+    """Запускает слежение за файлами правил в текущем процессе (потоки не переживают fork)."""
+    if RULES_WATCH_INTERVAL > 0:
+        RELOADER.watch(RULES_WATCH_INTERVAL)
+
+# PID мастера gunicorn (задаётся в post_fork). С preload_app воркеры форкаются
+# из базы мастера, поэтому перезагрузка через админку не ограничивается одним
+# воркером: после неё мастеру уходит SIGHUP, он заменяет все воркеры, а каждый
+# новый воркер в refresh_knowledge_base подхватывает сохранённый артефакт.
+MASTER_PID = None
+
+def refresh_knowledge_base():
+    """Заменяет унаследованную от мастера базу, если правила с тех пор изменились."""
+    if KB is not None and KB.source_hash != compute_source_hash():
+        install_knowledge_base(load_knowledge_base())
+
+def restart_workers(kb):
+    """Просит мастер gunicorn заменить воркеры, чтобы новая база была во всех."""
+    if MASTER_PID is not None:
+        os.kill(MASTER_PID, signal.SIGHUP)
+
 # === FLASK-ПРИЛОЖЕНИЕ ===
 import os
 
@@ -135,10 +500,12 @@ app = Flask(
     static_folder=os.path.join(BASE_DIR, 'Static'),
     template_folder=os.path.join(BASE_DIR, 'templates')
 )
+# Тело запроса больше лимита Flask отклоняет с 413, не читая его целиком
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
 
 @app.context_processor
 def inject_global_vars():
-    return {'progress': PROJECT_PROGRESS}
+    return {'progress': PROJECT_PROGRESS, 'live_analysis': LIVE_ANALYSIS}
 
 @app.route('/')
 def home():
@@ -160,10 +527,10 @@ def analyze_text():
 
     text = data.get('text', '').strip()
     if not text:
-        return jsonify({"error": "Пожалуйста, введите описание характера."}), 400
+        return jsonify({"error": EMPTY_TEXT_ERROR}), 400
 
     try:
-        result = analyze_with_rules(text)
+        result = ENGINE.analyze(text, data.get('explain') is True)
     except Exception as e:
         return jsonify({"error": f"Ошибка анализа: {str(e)}"}), 500
 
@@ -172,11 +539,136 @@ def analyze_text():
 
     return jsonify(result)
 
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    data = request.get_json(silent=True)
+    texts = data.get('texts') if isinstance(data, dict) else None
+    if not isinstance(texts, list):
+        return jsonify({"error": "Неверный формат данных: ожидается список texts"}), 400
+    if len(texts) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"Слишком много текстов в пачке (максимум {MAX_BATCH_SIZE})"}), 400
+
+    try:
+        results = ENGINE.analyze_batch(texts, data.get('explain') is True)
+    except Exception as e:
+        return jsonify({"error": f"Ошибка анализа: {str(e)}"}), 500
+
+    return jsonify({"results": results})
+
+@app.route('/api/analyze/session', methods=['POST'])
+def create_analysis_session():
+    data = request.get_json(silent=True)
+    text = data.get('text', '') if isinstance(data, dict) else None
+    if not isinstance(text, str):
+        return jsonify({"error": "Неверный формат данных"}), 400
+
+    # Те же лимиты, что у /api/analyze; обрезать текст сессии нельзя — он должен совпадать с клиентским
+    session = IncrementalSession(
+        get_knowledge_base().incremental_index, lemmatize_word,
+        max_bytes=MAX_TEXT_BYTES, max_tokens=MAX_TEXT_TOKENS,
+    )
+    try:
+        session.apply_edit(0, 0, text)
+    except TextLimitError:
+        return jsonify({"error": TEXT_TOO_LONG_ERROR}), 400
+    session_id = secrets.token_urlsafe(16)
+    SESSIONS.put(session_id, session)
+    return jsonify({
+        "session_id": session_id,
+        "version": session.version,
+        "result": analyze_session(session),
+    })
+
+@app.route('/api/analyze/session/<session_id>', methods=['POST'])
+def update_analysis_session(session_id):
+    session = SESSIONS.get(session_id)
+    if session is None:
+        return jsonify({"error": "Сессия не найдена или истекла"}), 404
+
+    data = request.get_json(silent=True)
+    edits = data.get('edits') if isinstance(data, dict) else None
+    if not isinstance(edits, list):
+        return jsonify({"error": "Неверный формат данных: ожидается список edits"}), 400
+
+    with session.lock:
+        # Версия защищает от потерянных или переставленных правок
+        if data.get('version', session.version) != session.version:
+            return jsonify({"error": "Версия сессии не совпадает", "version": session.version}), 409
+        applied = 0
+        try:
+            for edit in edits:
+                start, end, insert = edit['start'], edit['end'], edit.get('text', '')
+                if not isinstance(start, int) or not isinstance(end, int) or not isinstance(insert, str):
+                    raise ValueError("start и end должны быть числами, text — строкой")
+                session.apply_edit(start, end, insert)
+                applied += 1
+        except TextLimitError:
+            # Отклонённая правка сессию не меняет; если до неё что-то применилось — сессия разошлась с клиентом
+            if applied:
+                SESSIONS.discard(session_id)
+            return jsonify({"error": TEXT_TOO_LONG_ERROR, "version": session.version}), 400
+        except (KeyError, TypeError, ValueError) as e:
+            # Часть правок могла примениться — состояние больше не совпадает с клиентом
+            SESSIONS.discard(session_id)
+            return jsonify({"error": f"Неверная правка, создайте сессию заново: {e}"}), 400
+        session.version += 1
+        result = analyze_session(session)
+
+    # Повторная запись продлевает время жизни сессии
+    SESSIONS.put(session_id, session)
+    return jsonify({"version": session.version, "result": result})
+
+@app.route('/api/analyze/session/<session_id>', methods=['DELETE'])
+def delete_analysis_session(session_id):
+    SESSIONS.discard(session_id)
+    return '', 204
+
+@app.route('/api/admin/reload-rules', methods=['GET', 'POST'])
+def reload_rules():
+    if not ADMIN_TOKEN:
+        return page_not_found(None)
+    if not secrets.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        return jsonify({"error": "Доступ запрещён"}), 403
+
+    if request.method == 'GET':
+        return jsonify({**RELOADER.status, "source_hash": get_knowledge_base().source_hash})
+    # Под gunicorn после перезагрузки этого процесса мастер заменяет все воркеры
+    if not RELOADER.reload_in_background(on_installed=restart_workers):
+        return jsonify({"status": "in_progress"}), 409
+    return jsonify({"status": "started"}), 202
+
+@app.route('/healthz')
+def liveness():
+    """Процесс жив и отвечает; готовность к анализу — /readyz."""
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz')
+def readiness():
+    """200, когда процесс прогрет и анализ не будет ждать загрузки; иначе 503 и запуск прогрева."""
+    if WARM_UP_STATUS["state"] == "ready":
+        return jsonify(WARM_UP_STATUS)
+    start_warm_up()
+    return jsonify(WARM_UP_STATUS), 503
+
+@app.route('/metrics')
+def metrics():
+    # Метрики текущего процесса; воркеры пула процессов считают свои этапы отдельно
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
 @app.errorhandler(404)
 def page_not_found(e):
     return "Страница не найдена", 404
 
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({"error": f"Слишком большой запрос (максимум {MAX_REQUEST_BYTES} байт)"}), 413
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
+    if WARM_UP_MODE == "eager":
+        warm_up_worker()
+    elif WARM_UP_MODE == "background":
+        start_warm_up()
+    start_rules_watcher()
 
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -0,0 +1,165 @@
+# ASGI-вариант приложения: uvicorn asgi:app --workers 4
+#
+# POST /api/analyze обрабатывается асинхронно: анализ уходит в исполнитель
+# (пул процессов ENGINE или пул потоков), а цикл событий продолжает
+# принимать запросы. Очередь ограничена ASYNC_MAX_PENDING — сверх неё
+# сразу отвечаем 429, а анализ дольше ASYNC_TIMEOUT секунд получает 504,
+# чтобы большие тексты не задерживали короткие. Тело больше MAX_REQUEST_BYTES
+# не дочитывается и получает 413. Остальные маршруты отдаёт обычное
+# Flask-приложение.
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import (
+    app as flask_app, ENGINE, EMPTY_TEXT_ERROR, analyze_with_rules, start_rules_watcher, start_warm_up,
+    warm_up_worker,
+)
+from config import ASYNC_MAX_PENDING, ASYNC_TIMEOUT, ASYNC_THREADS, MAX_REQUEST_BYTES, WARM_UP_MODE
+
+wsgi_app = WsgiToAsgi(flask_app)
+executor = ThreadPoolExecutor(max_workers=ASYNC_THREADS, thread_name_prefix="analyze")
+pending = 0
+
+
+async def read_body(receive, limit=MAX_REQUEST_BYTES):
+    """Тело запроса целиком или None, если оно длиннее limit байт."""
+    chunks = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        more_body = message.get("more_body", False)
+    return b"".join(chunks)
+
+
+async def send_json(send, status, payload, headers=()):
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                    *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def submit_analysis(text, explain=False):
+    """concurrent.futures.Future анализа: в пуле процессов, если он включён, иначе в пуле потоков."""
+    if ENGINE.mode == "process":
+        return ENGINE.submit(text, explain)
+    return executor.submit(analyze_with_rules, text, explain)
+
+
+def release_slot():
+    global pending
+    pending -= 1
+
+
+def release_slot_when_done(future, loop):
+    """Освобождает слот очереди, когда завершится сама задача, а не ожидание ответа.
+
+    По таймауту начатый анализ нельзя прервать, и он продолжает занимать поток
+    или процесс — до его конца новая работа сверх ASYNC_MAX_PENDING не принимается.
+    """
+    def release(_):
+        try:
+            loop.call_soon_threadsafe(release_slot)
+        except RuntimeError:
+            # Цикл событий уже закрыт — освобождать нечего
+            pass
+
+    future.add_done_callback(release)
+
+
+async def wait_analysis(future):
+    # Отмена по таймауту снимает с очереди ещё не начатую задачу; начатую прервать нельзя
+    return await asyncio.wait_for(asyncio.wrap_future(future), ASYNC_TIMEOUT)
+
+
+async def analyze_text(receive, send):
+    global pending
+    if pending >= ASYNC_MAX_PENDING:
+        await send_json(send, 429, {"error": "Сервер перегружен, повторите запрос позже"},
+                        headers=[(b"retry-after", b"1")])
+        return
+    # Слот занимается до чтения тела: иначе запросы, чьё тело приходит по частям,
+    # успевают пройти проверку, пока предыдущие ещё читаются
+    pending += 1
+    future = None
+    loop = asyncio.get_running_loop()
+    try:
+        body = await read_body(receive)
+        if body is None:
+            await send_json(send, 413, {"error": f"Слишком большой запрос (максимум {MAX_REQUEST_BYTES} байт)"})
+            return
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict) or not data:
+            await send_json(send, 400, {"error": "Неверный формат данных"})
+            return
+
+        text = data.get('text', '')
+        text = text.strip() if isinstance(text, str) else ''
+        if not text:
+            await send_json(send, 400, {"error": EMPTY_TEXT_ERROR})
+            return
+
+        explain = data.get('explain') is True
+        try:
+            future = submit_analysis(text, explain)
+            try:
+                result = await wait_analysis(future)
+            except BrokenProcessPool:
+                # Процесс пула упал: ENGINE.analyze пересоздаёт пул и повторяет анализ в потоке
+                future = executor.submit(ENGINE.analyze, text, explain)
+                result = await wait_analysis(future)
+        except asyncio.TimeoutError:
+            await send_json(send, 504, {"error": "Анализ занял слишком много времени"})
+            return
+        except Exception as e:
+            await send_json(send, 500, {"error": f"Ошибка анализа: {str(e)}"})
+            return
+    finally:
+        if future is None:
+            release_slot()
+        else:
+            release_slot_when_done(future, loop)
+
+    await send_json(send, 400 if "error" in result else 200, result)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            if WARM_UP_MODE == "eager":
+                await asyncio.get_running_loop().run_in_executor(executor, warm_up_worker)
+            elif WARM_UP_MODE == "background":
+                start_warm_up()
+            start_rules_watcher()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            executor.shutdown(wait=False, cancel_futures=True)
+            ENGINE.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    elif scope["type"] == "http" and scope["path"] == "/api/analyze" and scope["method"] == "POST":
+        await analyze_text(receive, send)
+    else:
+        await wsgi_app(scope, receive, send)
@@ -0,0 +1,146 @@
+"""Сравнение способов поиска концептов на растущей базе синонимов.
+
+По умолчанию сравнивает полный перебор и обратный индекс (результаты должны
+совпадать). С --sequence сравнивает обратный индекс (режим subset) с
+автоматом по последовательностям лемм (режим sequence): скорость и то,
+сколько найденных subset-режимом концептов подтверждаются фразой подряд.
+С --compact сравнивает обратный индекс на множествах строк с целочисленным
+CompactConceptIndex (режим compact): скорость и память, занятую индексом.
+С --bitset сравнивает обратный индекс с BitsetMatcher (режим bitset) по одному
+тексту и пачкой из всех текстов сразу; результаты должны совпадать.
+
+Запуск: python benchmarks/bench_matcher.py [--sizes 1 4 16 32] [--texts 300] [--sequence | --compact | --bitset]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import get_knowledge_base, lemmatize_text_to_set, lemmatize_texts_to_sequences  # noqa: E402
+from benchmarks.synthetic import make_texts, scale_sequences, scale_synonyms  # noqa: E402
+from matcher import BitsetMatcher, CompactConceptIndex, ConceptIndex, PhraseAutomaton, scan_match  # noqa: E402
+
+KB = get_knowledge_base()
+NORMALIZED_SYNONYMS = KB.normalized_synonyms
+
+
+def timed(func, inputs):
+    start = time.perf_counter()
+    results = [func(item) for item in inputs]
+    return results, (time.perf_counter() - start) / len(inputs) * 1e6
+
+
+def build_measured(factory, synonyms):
+    """Строит индекс и возвращает его вместе с занятой им памятью в КиБ."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    index = factory(synonyms)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return index, size / 1024
+
+
+def compare_compact(args):
+    # Память индекса считается без самих строк-лемм: они общие с базой синонимов
+    user_lemma_sets = [lemmatize_text_to_set(text) for text in make_texts(args.texts)]
+
+    print(f"{'фраз':>8} {'set, мкс':>9} {'compact, мкс':>13} {'set, КиБ':>10} {'compact, КиБ':>13}")
+    for factor in args.sizes:
+        synonyms = scale_synonyms(NORMALIZED_SYNONYMS, factor)
+        index, index_kib = build_measured(ConceptIndex, synonyms)
+        compact, compact_kib = build_measured(CompactConceptIndex, synonyms)
+        indexed, index_us = timed(index.match, user_lemma_sets)
+        compacted, compact_us = timed(compact.match, user_lemma_sets)
+        if indexed != compacted:
+            raise SystemExit(f"Результаты расходятся на базе из {index.phrase_count} фраз")
+        print(f"{index.phrase_count:>8} {index_us:>9.1f} {compact_us:>13.1f} {index_kib:>10.0f} {compact_kib:>13.0f}")
+
+
+def compare_bitset(args):
+    user_lemma_sets = [lemmatize_text_to_set(text) for text in make_texts(args.texts)]
+
+    print(f"{'фраз':>8} {'set, мкс':>9} {'bitset, мкс':>12} {'пачкой, мкс':>12} {'ускорение':>10}")
+    for factor in args.sizes:
+        synonyms = scale_synonyms(NORMALIZED_SYNONYMS, factor)
+        index = ConceptIndex(synonyms)
+        bitset = BitsetMatcher(synonyms)
+        indexed, index_us = timed(index.match, user_lemma_sets)
+        single, single_us = timed(bitset.match, user_lemma_sets)
+        start = time.perf_counter()
+        batched = bitset.match_many(user_lemma_sets)
+        batch_us = (time.perf_counter() - start) / len(user_lemma_sets) * 1e6
+        if not indexed == single == batched:
+            raise SystemExit(f"Результаты расходятся на базе из {index.phrase_count} фраз")
+        print(f"{index.phrase_count:>8} {index_us:>9.1f} {single_us:>12.1f} {batch_us:>12.1f} "
+              f"{index_us / batch_us:>9.1f}x")
+
+
+def compare_sequence(args):
+    texts = make_texts(args.texts)
+    sequences = lemmatize_texts_to_sequences(texts)
+    lemma_sets = [set(sequence) for sequence in sequences]
+
+    print(f"{'фраз':>8} {'subset, мкс':>12} {'sequence, мкс':>14}")
+    for factor in args.sizes:
+        index = ConceptIndex(scale_synonyms(NORMALIZED_SYNONYMS, factor))
+        automaton = PhraseAutomaton(scale_sequences(KB.phrase_sequences, factor))
+        phrase_count = index.phrase_count
+        subset, subset_us = timed(index.match, lemma_sets)
+        ordered, sequence_us = timed(automaton.match, sequences)
+        print(f"{phrase_count:>8} {subset_us:>12.1f} {sequence_us:>14.1f}")
+
+    # Точность на реальной базе: sequence находит подмножество того, что находит subset
+    index, automaton = ConceptIndex(NORMALIZED_SYNONYMS), PhraseAutomaton(KB.phrase_sequences)
+    subset = [index.match(lemmas) for lemmas in lemma_sets]
+    ordered = [automaton.match(sequence) for sequence in sequences]
+    subset_total = sum(len(found) for found in subset)
+    confirmed = sum(len(a & b) for a, b in zip(subset, ordered))
+    identical = sum(a == b for a, b in zip(subset, ordered))
+    print()
+    print(f"концептов найдено subset: {subset_total}, sequence: {sum(len(found) for found in ordered)}")
+    print(f"subset-совпадений, подтверждённых фразой подряд: {confirmed / max(subset_total, 1):.1%}")
+    print(f"тексты с одинаковым набором концептов: {identical / len(texts):.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--texts", type=int, default=300)
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument("--sequence", action="store_true", help="сравнить режимы subset и sequence")
+    modes.add_argument("--compact", action="store_true", help="сравнить режимы subset и compact")
+    modes.add_argument("--bitset", action="store_true", help="сравнить режимы subset и bitset")
+    args = parser.parse_args()
+
+    if args.bitset:
+        compare_bitset(args)
+        return
+
+    if args.compact:
+        compare_compact(args)
+        return
+
+    if args.sequence:
+        compare_sequence(args)
+        return
+
+    user_lemma_sets = [lemmatize_text_to_set(text) for text in make_texts(args.texts)]
+
+    print(f"{'фраз':>8} {'перебор, мкс':>14} {'индекс, мкс':>13} {'ускорение':>10}")
+    for factor in args.sizes:
+        synonyms = scale_synonyms(NORMALIZED_SYNONYMS, factor)
+        index = ConceptIndex(synonyms)
+        phrase_count = sum(len(phrases) for phrases in synonyms.values())
+
+        scanned, scan_us = timed(lambda lemmas: scan_match(lemmas, synonyms), user_lemma_sets)
+        indexed, index_us = timed(index.match, user_lemma_sets)
+        if scanned != indexed:
+            raise SystemExit(f"Результаты расходятся на базе из {phrase_count} фраз")
+        print(f"{phrase_count:>8} {scan_us:>14.1f} {index_us:>13.1f} {scan_us / index_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Бенчмарк этапов анализа: normalize_phrase, lemmatize_text_to_set,
+expand_text_with_synonyms и analyze_with_rules.
+
+Для каждого этапа и размера входа считает перцентили задержки, пропускную
+способность и пиковую память (tracemalloc). Результаты можно сохранить как
+базовую линию и сравнить с ней прогон на другом коммите.
+
+RESULT_CACHE перед каждым проходом analyze_with_rules очищается, иначе со
+второго прохода мерялась бы выдача готовых ответов из кэша; --result-cache
+оставляет кэш, чтобы померить именно его.
+
+
+    python benchmarks/bench_pipeline.py --save benchmarks/baseline.json
+    python benchmarks/bench_pipeline.py --compare benchmarks/baseline.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+from benchmarks.synthetic import make_text, scale_synonyms  # noqa: E402
+from matcher import ConceptIndex  # noqa: E402
+from synonyms import SYNONYM_GROUPS  # noqa: E402
+
+TEXT_SIZES = [20, 200, 2000, 20000]
+SYNONYM_SCALES = [1, 10, 20]
+
+
+def percentile(sorted_values, q):
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(func, inputs, repeat, before_pass=None):
+    """Задержки каждого вызова, пропускная способность и пиковая память одного прохода.
+
+    before_pass() вызывается перед каждым проходом вне замеров (например, сбросить кэш).
+    """
+    before_pass = before_pass or (lambda: None)
+    for item in inputs[:3]:
+        func(item)
+
+    timings = []
+    elapsed = 0.0
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            before_pass()
+            start = time.perf_counter()
+            for item in inputs:
+                t0 = time.perf_counter()
+                func(item)
+                timings.append(time.perf_counter() - t0)
+            elapsed += time.perf_counter() - start
+    finally:
+        gc.enable()
+
+    # Память меряется отдельным проходом: tracemalloc заметно замедляет код
+    before_pass()
+    tracemalloc.start()
+    for item in inputs:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "calls": len(timings),
+        "mean_us": statistics.fmean(timings) * 1e6,
+        "p50_us": percentile(timings, 50) * 1e6,
+        "p90_us": percentile(timings, 90) * 1e6,
+        "p99_us": percentile(timings, 99) * 1e6,
+        "throughput_per_s": len(timings) / elapsed if elapsed else 0.0,
+        "peak_kb": peak / 1024,
+    }
+
+
+def run(args):
+    if args.no_cache:
+        app.LEMMA_CACHE.maxsize = 0
+        app.RESULT_CACHE.maxsize = 0
+
+    results = {}
+    phrases = [phrase for group in SYNONYM_GROUPS.values() for phrase in group]
+    results["normalize_phrase"] = measure(app.normalize_phrase, phrases, args.repeat)
+
+    # База строит только индекс своего MATCHER_MODE, а этот этап меряет режим subset
+    concept_index = ConceptIndex(app.get_knowledge_base().normalized_synonyms)
+    for size in TEXT_SIZES:
+        texts = [make_text(size, seed=seed) for seed in range(args.texts)]
+        lemma_sets = [app.lemmatize_text_to_set(text) for text in texts]
+        results[f"lemmatize_text_to_set/{size}"] = measure(app.lemmatize_text_to_set, texts, args.repeat)
+        results[f"expand_text_with_synonyms/{size}"] = measure(
+            lambda lemmas: app.expand_text_with_synonyms(lemmas, concept_index), lemma_sets, args.repeat
+        )
+        results[f"analyze_with_rules/{size}"] = measure(
+            app.analyze_with_rules, texts, args.repeat, before_pass=None if args.result_cache else app.RESULT_CACHE.clear
+        )
+
+    lemma_sets = [app.lemmatize_text_to_set(make_text(2000, seed=seed)) for seed in range(args.texts)]
+    for scale in SYNONYM_SCALES:
+        synonyms = scale_synonyms(app.get_knowledge_base().normalized_synonyms, scale)
+        index = ConceptIndex(synonyms)
+        phrase_count = sum(len(group) for group in synonyms.values())
+        results[f"expand_text_with_synonyms/phrases={phrase_count}"] = measure(
+            lambda lemmas: app.expand_text_with_synonyms(lemmas, index), lemma_sets, args.repeat
+        )
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results, baseline=None):
+    header = f"{'этап':<50} {'p50, мкс':>10} {'p99, мкс':>10} {'оп/с':>10} {'пик, КБ':>9}"
+    if baseline:
+        header += f" {'Δ p50':>8}"
+    print(header)
+    for name, stats in results.items():
+        line = (f"{name:<50} {stats['p50_us']:>10.1f} {stats['p99_us']:>10.1f} "
+                f"{stats['throughput_per_s']:>10.0f} {stats['peak_kb']:>9.1f}")
+        base = (baseline or {}).get(name)
+        if base:
+            line += f" {(stats['p50_us'] / base['p50_us'] - 1) * 100:>+7.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=50, help="текстов на каждый размер")
+    parser.add_argument("--repeat", type=int, default=3, help="проходов по каждому набору")
+    parser.add_argument("--no-cache", action="store_true", help="отключить кэши лемм и ответов")
+    parser.add_argument("--result-cache", action="store_true",
+                        help="не очищать RESULT_CACHE между проходами analyze_with_rules (мерить попадания в кэш)")
+    parser.add_argument("--save", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", help="сравнить p50 с сохранённой базовой линией")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="рост p50 в процентах, который считается регрессией")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_table(results, baseline)
+
+    if args.save:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "texts": args.texts,
+                "repeat": args.repeat,
+                "no_cache": args.no_cache,
+                "result_cache": args.result_cache,
+            },
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if baseline:
+        regressions = [
+            name for name, stats in results.items()
+            if name in baseline and stats["p50_us"] > baseline[name]["p50_us"] * (1 + args.threshold / 100)
+        ]
+        if regressions:
+            print(f"Регрессии больше {args.threshold}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
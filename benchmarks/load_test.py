@@ -0,0 +1,132 @@
+"""Нагрузочный тест /api/analyze.
+
+Либо бьёт по уже запущенному серверу (--url), либо сам поднимает
+dev-сервер Flask и/или gunicorn и сравнивает их пропускную способность:
+
+    python benchmarks/load_test.py --serve dev gunicorn --concurrency 16 --duration 20
+    python benchmarks/load_test.py --url http://localhost:5000
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_texts  # noqa: E402
+
+SERVER_COMMANDS = {
+    "dev": [sys.executable, "app.py"],
+    "gunicorn": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, env_overrides):
+    env = dict(os.environ, PORT=str(port), **env_overrides)
+    process = subprocess.Popen(
+        SERVER_COMMANDS[mode], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Сервер {mode} завершился с кодом {process.returncode}")
+        try:
+            urllib.request.urlopen(url + "/", timeout=1).close()
+            return process, url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Сервер {mode} не поднялся за 60 секунд")
+
+
+def run_load(url, texts, concurrency, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker(offset):
+        i = offset
+        local = []
+        local_errors = 0
+        while time.monotonic() < stop_at:
+            body = json.dumps({"text": texts[i % len(texts)]}).encode()
+            req = urllib.request.Request(
+                url + "/api/analyze", data=body, headers={"Content-Type": "application/json"}
+            )
+            t0 = time.perf_counter()
+            try:
+                urllib.request.urlopen(req, timeout=30).read()
+                local.append(time.perf_counter() - t0)
+            except (urllib.error.URLError, OSError):
+                local_errors += 1
+            i += concurrency
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="адрес уже запущенного сервера")
+    parser.add_argument("--serve", nargs="+", choices=sorted(SERVER_COMMANDS), default=["dev", "gunicorn"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд нагрузки на каждый сервер")
+    parser.add_argument("--texts", type=int, default=200, help="разных текстов в нагрузке")
+    parser.add_argument("--no-cache", action="store_true", help="выключить кэш ответов на сервере")
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts, min_phrases=3, seed=1)
+    targets = [("url", args.url)] if args.url else [(mode, None) for mode in args.serve]
+    env_overrides = {"RESULT_CACHE_SIZE": "0"} if args.no_cache else {}
+
+    print(f"{'сервер':<10} {'запросов':>9} {'ошибок':>7} {'rps':>8} {'p50, мс':>9} {'p99, мс':>9}")
+    for mode, url in targets:
+        process = None
+        if url is None:
+            process, url = start_server(mode, free_port(), env_overrides)
+        try:
+            stats = run_load(url, texts, args.concurrency, args.duration)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+        print(f"{mode:<10} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>8.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
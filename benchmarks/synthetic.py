@@ -0,0 +1,71 @@
+"""Синтетические данные для бенчмарков: описания характера и увеличенные базы синонимов."""
+import random
+
+from synonyms import SYNONYM_GROUPS
+
+FILLER_WORDS = (
+    "человек очень часто всегда иногда дома работа друзья учёба спорт любит "
+    "считает старается проявляет показывает ситуации команде семье занятиях"
+).split()
+
+
+def make_text(length, seed=0):
+    """Описание характера длиной около length символов из фраз synonyms.py и связок."""
+    rng = random.Random(seed)
+    phrases = [phrase for group in SYNONYM_GROUPS.values() for phrase in group]
+    parts = []
+    size = 0
+    while size < length:
+        part = rng.choice(phrases) if rng.random() < 0.6 else rng.choice(FILLER_WORDS)
+        parts.append(part)
+        size += len(part) + 2
+    text = ", ".join(parts)
+    if len(text) > length:
+        text = text[:length].rsplit(" ", 1)[0]
+    return text.capitalize() + "."
+
+
+def make_texts(count, min_phrases=1, max_phrases=10, seed=0):
+    """Тексты из случайных фраз synonyms.py вперемешку с нейтральными словами."""
+    rng = random.Random(seed)
+    phrases = [phrase for group in SYNONYM_GROUPS.values() for phrase in group]
+    texts = []
+    for _ in range(count):
+        parts = rng.sample(phrases, rng.randint(min_phrases, max_phrases))
+        parts += rng.choices(FILLER_WORDS, k=rng.randint(0, 15))
+        rng.shuffle(parts)
+        texts.append(", ".join(parts))
+    return texts
+
+
+def scale_synonyms(normalized_synonyms, factor, seed=0):
+    """Размножает базу: каждая копия концепта получает фразы с одной подменённой леммой."""
+    rng = random.Random(seed)
+    scaled = {concept: list(phrases) for concept, phrases in normalized_synonyms.items()}
+    for copy in range(1, factor):
+        for concept, phrases in normalized_synonyms.items():
+            variants = []
+            for phrase_lemmas in phrases:
+                lemmas = set(phrase_lemmas)
+                if lemmas:
+                    lemmas.discard(rng.choice(sorted(lemmas)))
+                    lemmas.add(f"синт{copy}_{rng.randrange(1000)}")
+                variants.append(lemmas)
+            scaled[f"{concept}#{copy}"] = variants
+    return scaled
+
+
+def scale_sequences(phrase_sequences, factor, seed=0):
+    """То же, что scale_synonyms, для фраз-последовательностей: подменяется лемма на случайной позиции."""
+    rng = random.Random(seed)
+    scaled = {concept: list(sequences) for concept, sequences in phrase_sequences.items()}
+    for copy in range(1, factor):
+        for concept, sequences in phrase_sequences.items():
+            variants = []
+            for sequence in sequences:
+                sequence = list(sequence)
+                if sequence:
+                    sequence[rng.randrange(len(sequence))] = f"синт{copy}_{rng.randrange(1000)}"
+                variants.append(tuple(sequence))
+            scaled[f"{concept}#{copy}"] = variants
+    return scaled
@@ -0,0 +1,124 @@
+"""Потоковый пересчёт архива анкет без Flask-сервера.
+
+Читает NDJSON или CSV из файла или stdin и построчно пишет NDJSON с
+ответами в том же формате, что и /api/analyze. Вход обрабатывается
+пачками, поэтому в памяти одновременно находится лишь несколько пачек.
+
+Примеры:
+    python bulk_analyze.py archive.ndjson -o results.ndjson --workers 4
+    cat answers.csv | python bulk_analyze.py --format csv --field answer
+"""
+import argparse
+import csv
+import json
+import sys
+from collections import deque
+from itertools import islice
+
+from app import analyze_batch_with_rules, warm_up_worker
+from engine import AnalysisEngine
+
+INVALID_RECORD_ERROR = "Неверный формат данных"
+
+
+class InvalidRecord:
+    """Строка входа, которую не удалось разобрать; в выходе на её месте будет ошибка."""
+
+
+def read_ndjson(stream, field):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield None, InvalidRecord()
+            continue
+        if isinstance(record, dict):
+            yield record, record.get(field, '')
+        elif isinstance(record, str):
+            yield None, record
+        else:
+            yield None, InvalidRecord()
+
+
+def read_csv(stream, field):
+    csv.field_size_limit(sys.maxsize)
+    for record in csv.DictReader(stream):
+        yield record, record.get(field) or ''
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def analyze_records(records, engine, chunk_size, id_field=None):
+    """Генератор ответов в порядке входа; обработка идёт пачками по chunk_size."""
+    chunks = chunked(records, chunk_size)
+    # Исходные записи нужны только для id, тексты уходят в воркеры
+    pending_chunks = deque()
+
+    def texts_of(chunks):
+        for chunk in chunks:
+            pending_chunks.append(chunk)
+            yield [text for _, text in chunk if not isinstance(text, InvalidRecord)]
+
+    for results in engine.imap_batches(texts_of(chunks)):
+        chunk = pending_chunks.popleft()
+        results = iter(results)
+        for record, text in chunk:
+            if isinstance(text, InvalidRecord):
+                result = {"error": INVALID_RECORD_ERROR}
+            else:
+                result = next(results)
+            if id_field is not None:
+                result = {"id": record.get(id_field) if record else None, **result}
+            yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("input", nargs="?", default="-", help="файл с анкетами, '-' — stdin")
+    parser.add_argument("-o", "--output", default="-", help="куда писать NDJSON, '-' — stdout")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="по умолчанию — по расширению файла")
+    parser.add_argument("--field", default="text", help="поле/колонка с текстом анкеты")
+    parser.add_argument("--id-field", help="поле/колонка, которую скопировать в ответ как id")
+    parser.add_argument("--chunk-size", type=int, default=500, help="текстов в одной пачке")
+    parser.add_argument("--workers", type=int, default=0, help="процессов анализа (0 — в текущем)")
+    args = parser.parse_args(argv)
+
+    input_format = args.format or ("csv" if args.input.endswith(".csv") else "ndjson")
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    reader = read_csv if input_format == "csv" else read_ndjson
+    engine = AnalysisEngine(
+        analyze=None,
+        analyze_batch=analyze_batch_with_rules,
+        warm_up=warm_up_worker,
+        workers=args.workers,
+    )
+    try:
+        records = reader(source, args.field)
+        for result in analyze_records(records, engine, args.chunk_size, args.id_field):
+            sink.write(json.dumps(result, ensure_ascii=False))
+            sink.write("\n")
+    finally:
+        engine.shutdown()
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# Кэши с ограничением размера для горячего пути анализа
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Потокобезопасный словарь ограниченного размера с вытеснением по LRU."""
+
+    def __init__(self, maxsize):
+        # maxsize=None — без ограничения, 0 — кэш фактически выключен
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def reset_stats(self):
+        """Обнуляет счётчики попаданий и промахов, не трогая записи."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def stats(self):
+        """Счётчики попаданий и промахов для мониторинга."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class TTLCache(LRUCache):
+    """LRU-кэш, записи которого дополнительно устаревают через ttl секунд."""
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self._clock = clock
+
+    def get(self, key, default=None):
+        entry = super().get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < self._clock():
+            with self._lock:
+                # Промах из-за устаревания, а не попадание
+                self.hits -= 1
+                self.misses += 1
+                self._data.pop(key, None)
+            return default
+        return value
+
+    def put(self, key, value):
+        super().put(key, (self._clock() + self.ttl, value))
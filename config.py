@@ -1,2 +1,100 @@
+import os
+
 # просто менять число - % прогресса работы над проектом
-PROJECT_PROGRESS = 70
\ No newline at end of file
+PROJECT_PROGRESS = 70
+
+# Сколько пар «слово → лемма» держать в памяти (LRU)
+LEMMA_CACHE_SIZE = int(os.environ.get("LEMMA_CACHE_SIZE", 50000))
+
+# Общее хранилище лемм на диске (см. lemma_store.py), например build/lemmas.bin;
+# пусто — не использовать
+LEMMA_STORE_PATH = os.environ.get("LEMMA_STORE_PATH", "")
+
+# Где хранить скомпилированную базу знаний (см. knowledge_base.py)
+KB_ARTIFACT_PATH = os.environ.get(
+    "KB_ARTIFACT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "build", "knowledge_base.pkl"),
+)
+
+# Максимум текстов в одном запросе к /api/analyze/batch
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 1000))
+
+# Число процессов для лемматизации и сопоставления (0 — анализ прямо в потоке запроса)
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", 0))
+# Способ запуска процессов пула: forkserver / spawn / fork. Пул создаётся, когда
+# в процессе уже есть потоки, поэтому fork может зависнуть на чужом замке;
+# forkserver недоступен только в Windows, там используется spawn
+ANALYSIS_START_METHOD = os.environ.get("ANALYSIS_START_METHOD") or ("spawn" if os.name == "nt" else "forkserver")
+# Сколько раз пересоздавать упавший пул, прежде чем перейти к анализу в потоке запроса
+ANALYSIS_MAX_RESTARTS = int(os.environ.get("ANALYSIS_MAX_RESTARTS", 3))
+
+# Кэш готовых ответов по множеству лемм: размер и время жизни записи в секундах
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 10000))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", 3600))
+
+# Таймеры этапов и счётчики для /metrics (METRICS_ENABLED=0 — полностью выключить)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+# Продакшен-режим (gunicorn.conf.py): число процессов и потоков в каждом
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", (os.cpu_count() or 1) * 2 + 1))
+WEB_THREADS = int(os.environ.get("WEB_THREADS", 1))
+
+# Асинхронный /api/analyze (asgi.py): сколько текстов может ждать или выполняться
+# одновременно (сверх — 429), таймаут одного анализа в секундах и потоки исполнителя
+ASYNC_MAX_PENDING = int(os.environ.get("ASYNC_MAX_PENDING", 64))
+ASYNC_TIMEOUT = float(os.environ.get("ASYNC_TIMEOUT", 10))
+ASYNC_THREADS = int(os.environ.get("ASYNC_THREADS", 4))
+
+# Как искать концепты: subset — все леммы фразы где угодно в тексте,
+# sequence — леммы фразы подряд и в том же порядке (автомат Ахо–Корасик),
+# compact — то же, что subset, но индекс на номерах лемм в array('I'): меньше памяти на воркер,
+# bitset — то же, что subset, но все фразы проверяются разом по маске словаря в NumPy
+# База знаний строит и хранит только структуру выбранного режима; смена режима её пересобирает
+MATCHER_MODE = os.environ.get("MATCHER_MODE", "subset")
+
+# Сессии инкрементального анализа: сколько хранить без правок (сек) и максимум сессий
+SESSION_TTL = float(os.environ.get("SESSION_TTL", 900))
+SESSION_MAX = int(os.environ.get("SESSION_MAX", 10000))
+
+# Живой анализ на странице /analyze (1 — включить). Сессии хранятся в памяти
+# воркера, поэтому включать только с одним воркером или с привязкой клиента
+# к воркеру на балансировщике: иначе правки попадают в чужой воркер и получают 404
+LIVE_ANALYSIS = os.environ.get("LIVE_ANALYSIS", "0") == "1"
+
+# Горячая перезагрузка правил: токен для POST /api/admin/reload-rules
+# (пусто — эндпоинт выключен) и период проверки файлов в секундах (0 — не следить)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+RULES_WATCH_INTERVAL = float(os.environ.get("RULES_WATCH_INTERVAL", 0))
+
+# Файл с базой знаний (.json / .toml / .msgpack, см. rules_loader.py);
+# пусто — synonyms.py и sport_rules.py
+RULES_PATH = os.environ.get("RULES_PATH", "")
+
+# Не включать в индексы и матрицу весов концепты, которые не влияют на результат
+# (PRUNE_RULES=0 — собирать базу целиком, например для отладки синонимов)
+PRUNE_RULES = os.environ.get("PRUNE_RULES", "1") != "0"
+
+# Ограничения на размер текста: байты UTF-8 и число слов в одном тексте.
+# TEXT_LIMIT_MODE=reject — отвечать ошибкой, truncate — анализировать начало
+# текста (разбор останавливается на лимите, хвост не читается) и пометить
+# ответ "truncated": true
+MAX_TEXT_BYTES = int(os.environ.get("MAX_TEXT_BYTES", 100_000))
+MAX_TEXT_TOKENS = int(os.environ.get("MAX_TEXT_TOKENS", 10_000))
+TEXT_LIMIT_MODE = os.environ.get("TEXT_LIMIT_MODE", "reject")
+
+# Максимальный размер тела HTTP-запроса (Flask MAX_CONTENT_LENGTH и asgi.py), сверх — 413
+MAX_REQUEST_BYTES = int(os.environ.get("MAX_REQUEST_BYTES", 16 * 1024 * 1024))
+
+# Когда загружать базу знаний и словари pymorphy3: eager — при старте сервера
+# до приёма запросов (gunicorn — в мастере до fork, память общая у воркеров),
+# background — в фоне после старта (статические страницы отдаются сразу,
+# готовность — /readyz), lazy — на первом анализе или запросе к /readyz
+WARM_UP_MODE = os.environ.get("WARM_UP_MODE", "eager")
+
+# Тексты, которые прогрев прогоняет через analyze_with_rules до готовности
+# (по описанию в строке), чтобы первые запросы не разгоняли pymorphy3 и кэши;
+# пусто — только загрузить базу и словари
+WARM_UP_CORPUS = os.environ.get(
+    "WARM_UP_CORPUS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "warm_up.txt"),
+)
@@ -0,0 +1,147 @@
+# Движок анализа: синхронно в потоке запроса или в пуле процессов.
+# pymorphy3 написан на чистом Python и упирается в GIL, поэтому для
+# параллельной лемматизации нужны именно процессы, а не потоки.
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker(warm_up):
+    if warm_up is not None:
+        warm_up()
+
+
+class AnalysisEngine:
+    """Выполняет analyze/analyze_batch в пуле процессов или, при workers=0, на месте."""
+
+    def __init__(self, analyze, analyze_batch, warm_up=None, workers=0, start_method=None, max_restarts=3):
+        self.analyze_func = analyze
+        self.analyze_batch_func = analyze_batch
+        self.warm_up = warm_up
+        self.workers = workers
+        self.start_method = start_method
+        self.max_restarts = max_restarts
+        self._pool = None
+        self._pool_pid = None
+        self._restarts = 0
+        self._lock = threading.Lock()
+
+    @property
+    def mode(self):
+        return "process" if self.workers > 0 else "sync"
+
+    def _get_pool(self):
+        # Пул создаётся лениво и заново после fork (например, в воркерах gunicorn):
+        # дочерние процессы не могут пользоваться пулом родителя. К этому моменту
+        # в процессе уже работают потоки (прогрев, слежение за правилами), поэтому
+        # start_method fork здесь опасен: замок, захваченный другим потоком, в
+        # дочернем процессе так и останется захваченным. По умолчанию — forkserver.
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    context = multiprocessing.get_context(self.start_method)
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=context,
+                        initializer=_init_worker,
+                        initargs=(self.warm_up,),
+                    )
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def _pool_broken(self, pool, error):
+        """Выбрасывает сломанный пул: следующий запрос создаст новый, а после
+        max_restarts падений движок переходит в синхронный режим."""
+        with self._lock:
+            if self._pool is not pool:
+                # Этот пул уже заменил другой поток
+                return
+            self._pool = None
+            self._restarts += 1
+            if self._restarts > self.max_restarts:
+                logger.error("Пул процессов анализа упал %d раз, переходим в синхронный режим: %s",
+                             self._restarts, error)
+                self.workers = 0
+            else:
+                logger.warning("Пул процессов анализа упал, пересоздаём (попытка %d из %d): %s",
+                               self._restarts, self.max_restarts, error)
+        pool.shutdown(wait=False)
+
+    def submit(self, text, *args):
+        """Ставит анализ текста в очередь и возвращает Future; args передаются функции анализа."""
+        if self.mode == "process":
+            pool = self._get_pool()
+            try:
+                return pool.submit(self.analyze_func, text, *args)
+            except BrokenProcessPool as e:
+                self._pool_broken(pool, e)
+        future = Future()
+        try:
+            future.set_result(self.analyze_func(text, *args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def analyze(self, text, *args):
+        if self.mode == "process":
+            pool = self._get_pool()
+            try:
+                return pool.submit(self.analyze_func, text, *args).result()
+            except BrokenProcessPool as e:
+                # Процесс пула упал до или после постановки задачи — повторяем на месте
+                self._pool_broken(pool, e)
+        return self.analyze_func(text, *args)
+
+    def analyze_batch(self, texts, *args):
+        """Делит пачку на куски по числу воркеров и склеивает результаты в исходном порядке."""
+        if self.mode == "sync" or len(texts) < 2:
+            return self.analyze_batch_func(texts, *args)
+
+        chunk_size = -(-len(texts) // self.workers)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        pool = self._get_pool()
+        try:
+            futures = [pool.submit(self.analyze_batch_func, chunk, *args) for chunk in chunks]
+            return [result for future in futures for result in future.result()]
+        except BrokenProcessPool as e:
+            self._pool_broken(pool, e)
+            return self.analyze_batch_func(texts, *args)
+
+    def imap_batches(self, batches, max_pending=None):
+        """Анализирует поток пачек по мере чтения, сохраняя порядок.
+
+        В работе одновременно не больше max_pending пачек, поэтому память не
+        зависит от размера входа.
+        """
+        if self.mode == "sync":
+            for batch in batches:
+                yield self.analyze_batch_func(batch)
+            return
+
+        pool = self._get_pool()
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(self.analyze_batch_func, batch))
+            if len(pending) >= (max_pending or 2 * self.workers):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def restart(self):
+        """Новый пул создастся при следующем обращении; начатые задачи старого пула доработают."""
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown()
+            self._pool = None
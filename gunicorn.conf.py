@@ -0,0 +1,36 @@
+# Настройки gunicorn для продакшена: gunicorn -c gunicorn.conf.py wsgi:app
+import os
+
+from config import WEB_WORKERS, WEB_THREADS
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Загружаем приложение в мастере до fork — см. wsgi.py
+preload_app = True
+
+workers = WEB_WORKERS
+threads = WEB_THREADS
+worker_class = "gthread" if WEB_THREADS > 1 else "sync"
+
+# Долгие тексты не должны убивать воркер раньше, чем он ответит
+timeout = int(os.environ.get("WEB_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    # Потоки мастера не переживают fork — следить за правилами и прогреваться
+    # в фоне начинает каждый воркер
+    import app
+    from app import refresh_knowledge_base, start_rules_watcher, start_warm_up
+    from config import WARM_UP_MODE
+
+    # Мастер держит базу с момента старта: если правила с тех пор перезагружали,
+    # воркер берёт новую из артефакта, а перезагрузка через админку шлёт мастеру SIGHUP
+    app.MASTER_PID = server.pid
+    refresh_knowledge_base()
+    if WARM_UP_MODE == "background":
+        start_warm_up()
+    start_rules_watcher()
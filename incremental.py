@@ -0,0 +1,144 @@
+# Инкрементальный анализ для клиентов, которые шлют правки по мере набора текста.
+#
+# Сессия хранит текст, счётчики лемм и для каждой фразы — сколько её разных
+# лемм уже есть в тексте. Правка «заменить text[start:end] на insert»
+# перелемматизирует только слова на границах правки, а счётчики фраз
+# обновляются только для лемм, которые появились или исчезли. Поэтому время
+# обработки пропорционально правке, а не длине документа.
+#
+# Семантика совпадает с режимом subset: концепт найден, если все леммы
+# хотя бы одной его фразы есть в тексте.
+#
+# Размер текста сессии ограничен так же, как у /api/analyze: правка, после
+# которой текст превысил бы max_bytes байт UTF-8 или max_tokens слов,
+# отклоняется до изменения сессии.
+import re
+import threading
+from collections import Counter
+
+WORD_CHAR = re.compile(r'[а-яёА-ЯЁ]')
+WORD = re.compile(r'[а-яё]+')
+
+# Такие же пороги, как в is_meaningful_text
+MIN_TEXT_LENGTH = 20
+MIN_LONG_WORDS = 3
+LONG_WORD_LENGTH = 3
+
+
+class IncrementalIndex:
+    """Для каждой леммы — все фразы, в которые она входит (а не только опорные, как в ConceptIndex)."""
+
+    def __init__(self, normalized_synonyms):
+        self.always_matched = set()
+        self.phrase_concepts = []
+        self.phrase_sizes = []
+        self.postings = {}
+        for concept, phrase_lemmas_list in normalized_synonyms.items():
+            for phrase_lemmas in phrase_lemmas_list:
+                if not phrase_lemmas:
+                    self.always_matched.add(concept)
+                    continue
+                phrase_id = len(self.phrase_concepts)
+                self.phrase_concepts.append(concept)
+                self.phrase_sizes.append(len(phrase_lemmas))
+                for lemma in phrase_lemmas:
+                    self.postings.setdefault(lemma, []).append(phrase_id)
+
+
+class TextLimitError(ValueError):
+    """Правка сделала бы текст сессии длиннее допустимого."""
+
+
+class IncrementalSession:
+    def __init__(self, index, lemmatize_word, max_bytes=None, max_tokens=None):
+        self.index = index
+        self.lemmatize_word = lemmatize_word
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.lock = threading.Lock()
+        self.version = 0
+        self.text = ""
+        self.text_bytes = 0
+        self.words = 0
+        self.long_words = 0
+        self.lemma_counts = Counter()
+        self.phrase_hits = Counter()
+        self.concept_hits = Counter()
+
+    @property
+    def is_meaningful(self):
+        return len(self.text) >= MIN_TEXT_LENGTH and self.long_words >= MIN_LONG_WORDS
+
+    @property
+    def concepts(self):
+        matched = {concept for concept, hits in self.concept_hits.items() if hits > 0}
+        return matched | self.index.always_matched
+
+    def apply_edit(self, start, end, insert):
+        """Заменяет text[start:end] на insert и обновляет счётчики по затронутым словам.
+
+        При превышении лимитов — TextLimitError, сессия при этом не меняется.
+        """
+        text = self.text
+        if not 0 <= start <= end <= len(text):
+            raise ValueError(f"Правка [{start}:{end}] вне текста длиной {len(text)}")
+
+        # Байты считаются до разбора на слова, чтобы огромная вставка не разбиралась вовсе
+        text_bytes = self.text_bytes - len(text[start:end].encode("utf-8")) + len(insert.encode("utf-8"))
+        if self.max_bytes is not None and text_bytes > self.max_bytes:
+            raise TextLimitError(f"Текст сессии превысил бы {self.max_bytes} байт")
+
+        # Расширяем окно до границ слов: слова, задетые правкой, разбираются заново
+        left = start
+        while left > 0 and WORD_CHAR.match(text[left - 1]):
+            left -= 1
+        right = end
+        while right < len(text) and WORD_CHAR.match(text[right]):
+            right += 1
+
+        old_window = text[left:right]
+        new_window = text[left:start] + insert + text[end:right]
+        old_words = WORD.findall(old_window.lower())
+        new_words = WORD.findall(new_window.lower())
+        words = self.words - len(old_words) + len(new_words)
+        if self.max_tokens is not None and words > self.max_tokens:
+            raise TextLimitError(f"Текст сессии превысил бы {self.max_tokens} слов")
+
+        self.text = text[:left] + new_window + text[right:]
+        self.text_bytes = text_bytes
+        self.words = words
+        for word in old_words:
+            self._remove_word(word)
+        for word in new_words:
+            self._add_word(word)
+
+    def _add_word(self, word):
+        if len(word) >= LONG_WORD_LENGTH:
+            self.long_words += 1
+        lemma = self.lemmatize_word(word)
+        if not lemma:
+            return
+        self.lemma_counts[lemma] += 1
+        if self.lemma_counts[lemma] > 1:
+            return
+        index = self.index
+        for phrase_id in index.postings.get(lemma, ()):
+            self.phrase_hits[phrase_id] += 1
+            if self.phrase_hits[phrase_id] == index.phrase_sizes[phrase_id]:
+                self.concept_hits[index.phrase_concepts[phrase_id]] += 1
+
+    def _remove_word(self, word):
+        if len(word) >= LONG_WORD_LENGTH:
+            self.long_words -= 1
+        lemma = self.lemmatize_word(word)
+        if not lemma:
+            return
+        self.lemma_counts[lemma] -= 1
+        if self.lemma_counts[lemma] > 0:
+            return
+        del self.lemma_counts[lemma]
+        index = self.index
+        for phrase_id in index.postings.get(lemma, ()):
+            if self.phrase_hits[phrase_id] == index.phrase_sizes[phrase_id]:
+                self.concept_hits[index.phrase_concepts[phrase_id]] -= 1
+            self.phrase_hits[phrase_id] -= 1
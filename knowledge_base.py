@@ -0,0 +1,182 @@
+# Скомпилированная база знаний: нормализованные синонимы, индекс лемм и матрица весов.
+# Собирается один раз и сохраняется на диск; при старте загружается готовой,
+# а пересобирается только если изменились исходные файлы или MATCHER_MODE.
+# Строится только поисковая структура выбранного режима MATCHER_MODE.
+#
+# Ручная сборка: python knowledge_base.py
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from functools import cached_property
+
+from config import KB_ARTIFACT_PATH, MATCHER_MODE, PRUNE_RULES, RULES_PATH
+from incremental import IncrementalIndex
+from lemmatizer import morph_version, normalize_phrase, normalize_phrase_sequence
+from matcher import BitsetMatcher, CompactConceptIndex, ConceptIndex, PhraseAutomaton
+from rules_loader import load_rules, rules_source_paths
+from rules_report import build_report, format_report, live_concepts
+from scoring import SportScorer
+
+logger = logging.getLogger(__name__)
+
+# Увеличивать при любом изменении структуры KnowledgeBase
+KB_FORMAT_VERSION = 11
+
+
+class KnowledgeBase:
+    """Всё, что нужно анализу и не зависит от конкретного запроса."""
+
+    def __init__(self, synonym_groups, sport_rules, score_modifiers, source_hash, previous=None,
+                 matcher_mode=MATCHER_MODE):
+        self.source_hash = source_hash
+        self.matcher_mode = matcher_mode
+
+        # Фраза → (множество лемм, последовательность лемм). При перезагрузке правил
+        # неизменённые фразы берутся из прошлой базы и заново не лемматизируются.
+        known = previous.normalized_phrases if previous is not None else {}
+        self.normalized_phrases = {}
+        self.relemmatized_phrases = 0
+        for phrases in synonym_groups.values():
+            for phrase in phrases:
+                if phrase in self.normalized_phrases:
+                    continue
+                normalized = known.get(phrase)
+                if normalized is None:
+                    normalized = (normalize_phrase(phrase), normalize_phrase_sequence(phrase))
+                    self.relemmatized_phrases += 1
+                self.normalized_phrases[phrase] = normalized
+
+        # Отчёт о несостыковках считается по полной базе, до отсечения лишнего
+        self.report = build_report(
+            synonym_groups, sport_rules, lambda phrase: self.normalized_phrases[phrase][0], score_modifiers
+        )
+        for line in format_report(self.report, duplicates=False):
+            logger.warning(line)
+        if self.report["duplicate_phrases"]:
+            logger.info("Фраз, общих для нескольких концептов: %d (python rules_report.py)",
+                        len(self.report["duplicate_phrases"]))
+
+        # В индексы и матрицу попадают только концепты, влияющие на результат:
+        # группы без видов спорта и модификаторов не ищутся, веса концептов без групп
+        # не получают столбцов (max_scores при этом считается по полным весам)
+        concepts = live_concepts(synonym_groups, sport_rules, score_modifiers) if PRUNE_RULES else list(synonym_groups)
+        self.pruned_concepts = [concept for concept in synonym_groups if concept not in concepts]
+
+        # Фразы концептов; строки общие с normalized_phrases и в pickle хранятся один раз
+        self.concept_phrases = {concept: synonym_groups[concept] for concept in concepts}
+        self.scorer = SportScorer(
+            sport_rules, reachable=set(synonym_groups) if PRUNE_RULES else None, score_modifiers=score_modifiers
+        )
+        self.matcher = self.build_matcher(matcher_mode)
+
+    @property
+    def normalized_synonyms(self):
+        """Концепт → множества лемм его фраз (собирается при каждом обращении)."""
+        return {
+            concept: [self.normalized_phrases[phrase][0] for phrase in phrases]
+            for concept, phrases in self.concept_phrases.items()
+        }
+
+    @property
+    def phrase_sequences(self):
+        """Концепт → последовательности лемм его фраз (собирается при каждом обращении)."""
+        return {
+            concept: [self.normalized_phrases[phrase][1] for phrase in phrases]
+            for concept, phrases in self.concept_phrases.items()
+        }
+
+    def build_matcher(self, mode):
+        """Поисковая структура режима mode; в compact и bitset номера концептов — столбцы scorer."""
+        if mode == "sequence":
+            return PhraseAutomaton(self.phrase_sequences)
+        if mode == "compact":
+            return CompactConceptIndex(self.normalized_synonyms, self.scorer.concepts)
+        if mode == "bitset":
+            return BitsetMatcher(self.normalized_synonyms, self.scorer.concepts)
+        return ConceptIndex(self.normalized_synonyms)
+
+    @cached_property
+    def incremental_index(self):
+        """Индекс для сессий живого набора; строится в процессе при первой сессии."""
+        return IncrementalIndex(self.normalized_synonyms)
+
+    def __getstate__(self):
+        # Индекс сессий в артефакт не попадает: он нужен не каждому процессу
+        state = dict(self.__dict__)
+        state.pop("incremental_index", None)
+        return state
+
+
+def compute_source_hash(paths=None):
+    """Хэш содержимого исходников базы знаний, версии формата, pymorphy3 и его словарей
+    и настроек, от которых зависит сборка (MATCHER_MODE, PRUNE_RULES)."""
+    digest = hashlib.sha256()
+    digest.update(f"{KB_FORMAT_VERSION}:{morph_version()}:{MATCHER_MODE}:{PRUNE_RULES}".encode())
+    for path in paths or rules_source_paths(RULES_PATH):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def build_knowledge_base(source_hash=None, previous=None):
+    """Собирает базу из RULES_PATH или, если он не задан, из synonyms.py и sport_rules.py.
+
+    Файлы каждый раз читаются заново, поэтому годится и для горячей перезагрузки;
+    фразы, которые не изменились, переиспользуются из previous.
+    """
+    synonym_groups, sport_rules, score_modifiers = load_rules(RULES_PATH)
+    return KnowledgeBase(
+        synonym_groups,
+        sport_rules,
+        score_modifiers,
+        source_hash or compute_source_hash(),
+        previous=previous,
+    )
+
+
+def save_knowledge_base(kb, path=KB_ARTIFACT_PATH):
+    """Атомарно записывает артефакт, чтобы параллельно стартующие воркеры не прочли его недописанным."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(kb, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_knowledge_base(path=KB_ARTIFACT_PATH):
+    """Загружает артефакт, если он собран из тех же исходников, иначе пересобирает его."""
+    source_hash = compute_source_hash()
+    try:
+        with open(path, "rb") as f:
+            kb = pickle.load(f)
+        if isinstance(kb, KnowledgeBase) and kb.source_hash == source_hash:
+            return kb
+        logger.info("Артефакт базы знаний устарел, пересобираем: %s", path)
+    except FileNotFoundError:
+        logger.info("Артефакт базы знаний не найден, собираем: %s", path)
+    except Exception as e:
+        logger.warning("Не удалось прочитать артефакт базы знаний %s: %s", path, e)
+
+    kb = build_knowledge_base(source_hash)
+    try:
+        save_knowledge_base(kb, path)
+    except OSError as e:
+        logger.warning("Не удалось сохранить артефакт базы знаний %s: %s", path, e)
+    return kb
+
+
+if __name__ == '__main__':
+    # Импортируем модуль по имени, чтобы в pickle попал knowledge_base.KnowledgeBase, а не __main__
+    from knowledge_base import build_knowledge_base, save_knowledge_base
+
+    kb = build_knowledge_base()
+    save_knowledge_base(kb)
+    print(f"База знаний записана в {KB_ARTIFACT_PATH} ({os.path.getsize(KB_ARTIFACT_PATH)} байт)")
@@ -0,0 +1,290 @@
+"""
+Общее для всех процессов хранилище лемм на диске.
+
+Второй уровень кэша после LEMMA_CACHE: файл с отсортированными парами
+«слово → лемма», который каждый процесс открывает через mmap. Страницы файла
+лежат в общем кэше ОС, поэтому воркеры не копируют их и не прогревают заново
+после перезапуска; поиск — двоичный по таблице смещений.
+
+Формат файла:
+    MAGIC, длина и версия pymorphy3 со словарями, число записей N (uint32),
+    N + 1 смещений записей (uint32, от начала данных),
+    записи "слово\\tлемма\\n", отсортированные по байтам слова в UTF-8.
+
+Файл только читается. Слова, которых в нём нет, разбираются через
+morph.parse, а результат в фоновом потоке дописывается в журнал <путь>.log;
+следующая сборка вливает журнал в файл. Каждый процесс пишет слово в журнал
+не больше одного раза (и не больше MAX_RECORDED слов всего), поэтому
+вытеснение из LEMMA_CACHE не раздувает журнал, но разные процессы могут
+записать одно слово каждый — сборка сводит повторы. Файл, собранный другой
+версией pymorphy3 или его словарей, не используется.
+
+Работающие процессы держат открытым тот файл, который застали при старте:
+пересобранный файл подхватывают только новые процессы, поэтому после
+сборки воркеры нужно перезапустить (для gunicorn — SIGHUP мастеру).
+
+Сборка из словаря SYNONYM_GROUPS, журнала и частотного списка слов
+пользователей (по слову в строке, после слова может идти число):
+    python lemma_store.py build [--frequency words.txt]
+"""
+import argparse
+import logging
+import mmap
+import os
+import queue
+import re
+import struct
+import sys
+import tempfile
+import threading
+
+from lemmatizer import morph_version
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SSLEMMA1"
+OFFSET = struct.Struct("<I")
+
+
+class LemmaStore:
+    # Сколько разных слов процесс дописывает в журнал; дальше новые слова не записываются
+    MAX_RECORDED = 100_000
+
+    def __init__(self, path):
+        self.path = path
+        self.log_path = path + ".log"
+        self.count = 0
+        self._mm = None
+        self._offsets_start = 0
+        self._data_start = 0
+        self._queue = None
+        self._writer_pid = None
+        self._writer_lock = threading.Lock()
+        self._recorded = set()
+        self._open()
+
+    def _open(self):
+        try:
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError — пустой файл, mmap нулевой длины не создаётся
+            logger.info("Хранилище лемм %s не найдено, слова будут разбираться заново", self.path)
+            return
+        position = len(MAGIC)
+        if mm[:position] != MAGIC:
+            logger.warning("%s не является хранилищем лемм", self.path)
+            return
+        try:
+            (version_length,) = struct.unpack_from("<H", mm, position)
+            position += 2
+            version = mm[position:position + version_length].decode()
+            position += version_length
+            if version != morph_version():
+                logger.warning("Хранилище лемм %s собрано pymorphy3 %s, а установлен %s, не используем",
+                               self.path, version, morph_version())
+                return
+            (count,) = OFFSET.unpack_from(mm, position)
+            offsets_start = position + OFFSET.size
+            data_start = offsets_start + (count + 1) * OFFSET.size
+            # Таблица смещений и данные должны целиком помещаться в файл
+            (data_size,) = OFFSET.unpack_from(mm, data_start - OFFSET.size)
+        except (struct.error, UnicodeDecodeError):
+            data_start = data_size = None
+        if data_start is None or data_start + data_size > len(mm):
+            # Обрезанный или недокопированный файл: работаем без него, как без файла
+            logger.warning("Хранилище лемм %s повреждено или обрезано, не используем", self.path)
+            return
+        self.count = count
+        self._offsets_start = offsets_start
+        self._data_start = data_start
+        self._mm = mm
+
+    def __len__(self):
+        return self.count
+
+    def _record_bounds(self, i):
+        start = self._data_start + OFFSET.unpack_from(self._mm, self._offsets_start + i * OFFSET.size)[0]
+        end = self._data_start + OFFSET.unpack_from(self._mm, self._offsets_start + (i + 1) * OFFSET.size)[0]
+        return start, end
+
+    def get(self, word):
+        """Лемма слова из файла или None, если слова там нет ("" — разбора нет)."""
+        mm = self._mm
+        if mm is None:
+            return None
+        key = word.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, end = self._record_bounds(mid)
+            tab = mm.find(b"\t", start, end)
+            found = mm[start:tab]
+            if found == key:
+                return mm[tab + 1:end - 1].decode("utf-8")
+            if found < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def items(self):
+        """Все пары (слово, лемма) файла по порядку."""
+        mm = self._mm
+        for i in range(self.count):
+            start, end = self._record_bounds(i)
+            word, lemma = mm[start:end - 1].decode("utf-8").split("\t")
+            yield word, lemma
+
+    def record(self, word, lemma):
+        """Ставит новую пару в очередь на запись в журнал, не дожидаясь диска.
+
+        Слово, уже записанное этим процессом, повторно не пишется.
+        """
+        if word in self._recorded or len(self._recorded) >= self.MAX_RECORDED:
+            return
+        self._recorded.add(word)
+        if self._writer_pid != os.getpid():
+            # Поток записи не переживает fork — в каждом процессе запускаем свой
+            with self._writer_lock:
+                if self._writer_pid != os.getpid():
+                    self._queue = queue.SimpleQueue()
+                    threading.Thread(target=self._write_loop, args=(self._queue,),
+                                     name="lemma-store", daemon=True).start()
+                    self._writer_pid = os.getpid()
+        self._queue.put((word, lemma))
+
+    def _write_loop(self, pending):
+        while True:
+            entries = [pending.get()]
+            while not pending.empty():
+                entries.append(pending.get())
+            lines = "".join(f"{word}\t{lemma}\n" for word, lemma in entries).encode("utf-8")
+            # O_APPEND: строки нескольких процессов не перемешиваются внутри одной записи.
+            # Файл открывается заново, чтобы не писать в журнал, уже удалённый сборкой
+            try:
+                fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, lines)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                logger.warning("Не удалось дописать журнал лемм %s: %s", self.log_path, e)
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+            self.count = 0
+
+
+def read_log(path):
+    """Пары из журнала; неполная последняя строка (запись прервана) пропускается."""
+    entries = {}
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if line.endswith("\n") and len(parts) == 2 and parts[0]:
+                    entries[parts[0]] = parts[1]
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def read_frequency_list(path):
+    """Слова из частотного списка: первое поле каждой строки, в нижнем регистре."""
+    words = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.split()
+            if fields:
+                words.extend(re.findall(r'[а-яё]+', fields[0].lower()))
+    return words
+
+
+def vocabulary_words(synonym_groups):
+    """Все слова фраз SYNONYM_GROUPS в том виде, в каком их разбирает лемматизатор."""
+    words = set()
+    for phrases in synonym_groups.values():
+        for phrase in phrases:
+            words.update(re.findall(r'[а-яё]+', phrase.lower()))
+    return words
+
+
+def write_store(path, entries):
+    """Атомарно записывает файл хранилища из словаря «слово → лемма»."""
+    records = sorted((word.encode("utf-8"), lemma.encode("utf-8")) for word, lemma in entries.items())
+    version = morph_version().encode()
+    offsets = [0]
+    for word, lemma in records:
+        offsets.append(offsets[-1] + len(word) + len(lemma) + 2)
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<H", len(version)))
+            f.write(version)
+            f.write(OFFSET.pack(len(records)))
+            f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            for word, lemma in records:
+                f.write(word + b"\t" + lemma + b"\n")
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def build_store(path, words=()):
+    """Собирает файл заново: прежние записи, журнал и разбор недостающих слов.
+
+    Возвращает число записей. Журнал после сборки удаляется.
+    """
+    from lemmatizer import get_morph
+
+    existing = LemmaStore(path)
+    entries = dict(existing.items())
+    existing.close()
+    entries.update(read_log(path + ".log"))
+
+    morph = get_morph()
+    for word in words:
+        if word not in entries:
+            parsed = morph.parse(word)
+            entries[word] = parsed[0].normal_form if parsed else ""
+
+    write_store(path, entries)
+    try:
+        os.unlink(path + ".log")
+    except FileNotFoundError:
+        pass
+    return len(entries)
+
+
+def main(argv):
+    from config import LEMMA_STORE_PATH, RULES_PATH
+    from rules_loader import load_rules
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--path", default=LEMMA_STORE_PATH, help="файл хранилища (по умолчанию LEMMA_STORE_PATH)")
+    parser.add_argument("--frequency", help="частотный список слов пользователей")
+    args = parser.parse_args(argv)
+    if not args.path:
+        parser.error("не задан путь: LEMMA_STORE_PATH или --path")
+
+    synonym_groups, _, _ = load_rules(RULES_PATH)
+    words = vocabulary_words(synonym_groups)
+    if args.frequency:
+        words.update(read_frequency_list(args.frequency))
+    count = build_store(args.path, sorted(words))
+    print(f"Хранилище лемм записано в {args.path} ({count} слов, {os.path.getsize(args.path)} байт)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
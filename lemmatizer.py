@@ -0,0 +1,85 @@
+# Лемматизация слов через pymorphy3 с общим кэшем
+import importlib.metadata
+import re
+import threading
+
+import pymorphy3
+
+from cache import LRUCache
+from config import LEMMA_CACHE_SIZE, LEMMA_STORE_PATH
+
+LEMMA_CACHE = LRUCache(LEMMA_CACHE_SIZE)
+
+_morph = None
+_morph_lock = threading.Lock()
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_morph():
+    """Создаёт MorphAnalyzer при первом обращении (загрузка словарей — самая дорогая часть старта)."""
+    global _morph
+    if _morph is None:
+        with _morph_lock:
+            if _morph is None:
+                _morph = pymorphy3.MorphAnalyzer()
+    return _morph
+
+
+def morph_version():
+    """Версия pymorphy3 вместе с версией пакета словарей: от обеих зависят леммы.
+    Анализатор при этом не создаётся."""
+    try:
+        dicts_version = importlib.metadata.version("pymorphy3-dicts-ru")
+    except importlib.metadata.PackageNotFoundError:
+        dicts_version = "unknown"
+    return f"{pymorphy3.__version__}+{dicts_version}"
+
+
+def get_lemma_store():
+    """Открывает общее хранилище лемм при первом обращении; None, если LEMMA_STORE_PATH не задан."""
+    global _store
+    if _store is None and LEMMA_STORE_PATH:
+        with _store_lock:
+            if _store is None:
+                from lemma_store import LemmaStore
+
+                _store = LemmaStore(LEMMA_STORE_PATH)
+    return _store
+
+
+def lemmatize_word(word):
+    """Возвращает нормальную форму слова ("" — если разбора нет).
+
+    Сначала LRU-кэш процесса, затем общее хранилище на диске, и только потом
+    morph.parse; новый разбор дописывается в хранилище в фоне.
+    """
+    lemma = LEMMA_CACHE.get(word)
+    if lemma is None:
+        store = get_lemma_store()
+        if store is not None:
+            lemma = store.get(word)
+        if lemma is None:
+            parsed = get_morph().parse(word)
+            lemma = parsed[0].normal_form if parsed else ""
+            if store is not None:
+                store.record(word, lemma)
+        LEMMA_CACHE.put(word, lemma)
+    return lemma
+
+
+def normalize_phrase(phrase):
+    """Превращает фразу в множество лемм."""
+    words = re.findall(r'[а-яё]+', phrase.lower())
+    lemmas = set()
+    for word in words:
+        lemma = lemmatize_word(word)
+        if lemma:
+            lemmas.add(lemma)
+    return lemmas
+
+
+def normalize_phrase_sequence(phrase):
+    """Леммы фразы в исходном порядке (для сопоставления с учётом порядка слов)."""
+    lemmas = (lemmatize_word(word) for word in re.findall(r'[а-яё]+', phrase.lower()))
+    return tuple(lemma for lemma in lemmas if lemma)
@@ -0,0 +1,318 @@
+# Сопоставление лемм пользователя с нормализованными фразами-синонимами
+from array import array
+from collections import Counter, deque
+
+import numpy as np
+
+
+def scan_match(user_lemmas, normalized_synonyms):
+    """Полный перебор всех фраз (эталонная реализация для сравнения)."""
+    matched_concepts = set()
+    for concept, phrase_lemmas_list in normalized_synonyms.items():
+        for phrase_lemmas in phrase_lemmas_list:
+            if phrase_lemmas.issubset(user_lemmas):
+                matched_concepts.add(concept)
+                break
+    return matched_concepts
+
+
+class ConceptIndex:
+    """Обратный индекс «лемма → фразы».
+
+    Каждая фраза записывается только под своей самой редкой леммой, поэтому
+    на запрос проверяются лишь фразы, у которых эта лемма есть в тексте.
+    """
+
+    def __init__(self, normalized_synonyms):
+        frequency = Counter()
+        for phrase_lemmas_list in normalized_synonyms.values():
+            for phrase_lemmas in phrase_lemmas_list:
+                frequency.update(phrase_lemmas)
+
+        # Фраза без лемм — подмножество любого текста, концепт совпадает всегда
+        self.always_matched = set()
+        self.postings = {}
+        self.phrase_count = 0
+        for concept, phrase_lemmas_list in normalized_synonyms.items():
+            for phrase_lemmas in phrase_lemmas_list:
+                if not phrase_lemmas:
+                    self.always_matched.add(concept)
+                    continue
+                anchor = min(phrase_lemmas, key=lambda lemma: (frequency[lemma], lemma))
+                self.postings.setdefault(anchor, []).append((concept, frozenset(phrase_lemmas)))
+                self.phrase_count += 1
+
+    def match(self, user_lemmas):
+        """Возвращает то же множество концептов, что и scan_match."""
+        matched_concepts = set(self.always_matched)
+        postings = self.postings
+        for lemma in user_lemmas:
+            candidates = postings.get(lemma)
+            if candidates is None:
+                continue
+            for concept, phrase_lemmas in candidates:
+                if concept not in matched_concepts and phrase_lemmas.issubset(user_lemmas):
+                    matched_concepts.add(concept)
+        return matched_concepts
+
+
+class CompactConceptIndex:
+    """Тот же индекс по опорной лемме, но на целых числах вместо множеств строк.
+
+    Леммы пронумерованы по возрастанию частоты, поэтому самая редкая лемма
+    фразы — её наименьший номер. Однословные фразы сведены к спискам концептов
+    по лемме, остальные хранятся отсортированными срезами одного array('I') и
+    сгруппированы по опорной лемме: фразы с опорой v — это номера
+    anchor_offsets[v]:anchor_offsets[v + 1]. Концепты тоже пронумерованы; если
+    передан concepts, первые номера совпадают со столбцами SportScorer.
+    """
+
+    __slots__ = (
+        "vocabulary", "concepts", "always_matched", "single_offsets", "single_concepts",
+        "phrase_concepts", "phrase_offsets", "phrase_lemmas", "anchor_offsets",
+    )
+
+    def __init__(self, normalized_synonyms, concepts=()):
+        self.concepts = list(concepts)
+        known = set(self.concepts)
+        self.concepts.extend(concept for concept in normalized_synonyms if concept not in known)
+        concept_ids = {concept: i for i, concept in enumerate(self.concepts)}
+
+        frequency = Counter()
+        for phrase_lemmas_list in normalized_synonyms.values():
+            for phrase_lemmas in phrase_lemmas_list:
+                frequency.update(phrase_lemmas)
+        ordered = sorted(frequency, key=lambda lemma: (frequency[lemma], lemma))
+        self.vocabulary = {lemma: i for i, lemma in enumerate(ordered)}
+
+        always_matched = set()
+        phrases = set()
+        for concept, phrase_lemmas_list in normalized_synonyms.items():
+            for phrase_lemmas in phrase_lemmas_list:
+                if not phrase_lemmas:
+                    always_matched.add(concept_ids[concept])
+                    continue
+                phrases.add((tuple(sorted(self.vocabulary[lemma] for lemma in phrase_lemmas)), concept_ids[concept]))
+        self.always_matched = frozenset(always_matched)
+
+        # Сортировка по опорной лемме делает фразы с одной опорой соседними
+        size = len(self.vocabulary) + 1
+        self.single_offsets = array("I", [0] * size)
+        self.single_concepts = array("I")
+        self.phrase_concepts = array("I")
+        self.phrase_offsets = array("I", [0])
+        self.phrase_lemmas = array("I")
+        self.anchor_offsets = array("I", [0] * size)
+        for lemma_ids, concept_id in sorted(phrases):
+            if len(lemma_ids) == 1:
+                self.single_concepts.append(concept_id)
+                self.single_offsets[lemma_ids[0] + 1] += 1
+                continue
+            self.phrase_concepts.append(concept_id)
+            self.phrase_lemmas.extend(lemma_ids)
+            self.phrase_offsets.append(len(self.phrase_lemmas))
+            self.anchor_offsets[lemma_ids[0] + 1] += 1
+        for v in range(1, size):
+            self.single_offsets[v] += self.single_offsets[v - 1]
+            self.anchor_offsets[v] += self.anchor_offsets[v - 1]
+
+    @property
+    def phrase_count(self):
+        return len(self.single_concepts) + len(self.phrase_concepts)
+
+    def lemma_ids(self, user_lemmas):
+        """Номера лемм текста; леммы вне словаря ни в одну фразу не входят и отбрасываются."""
+        get = self.vocabulary.get
+        return {i for i in map(get, user_lemmas) if i is not None}
+
+    def match_ids(self, user_lemmas):
+        """Номера найденных концептов."""
+        lemma_ids = self.lemma_ids(user_lemmas)
+        matched = set(self.always_matched)
+        single_offsets = self.single_offsets
+        single_concepts = self.single_concepts
+        anchor_offsets = self.anchor_offsets
+        phrase_concepts = self.phrase_concepts
+        phrase_offsets = self.phrase_offsets
+        phrase_lemmas = self.phrase_lemmas
+        for v in lemma_ids:
+            start, stop = single_offsets[v], single_offsets[v + 1]
+            if start != stop:
+                matched.update(single_concepts[start:stop])
+            for p in range(anchor_offsets[v], anchor_offsets[v + 1]):
+                concept_id = phrase_concepts[p]
+                # Первый элемент среза — сама опорная лемма v, она уже есть в тексте
+                if concept_id not in matched and lemma_ids.issuperset(
+                        phrase_lemmas[phrase_offsets[p] + 1:phrase_offsets[p + 1]]):
+                    matched.add(concept_id)
+        return matched
+
+    def match(self, user_lemmas):
+        """Возвращает то же множество концептов, что и scan_match."""
+        concepts = self.concepts
+        return {concepts[i] for i in self.match_ids(user_lemmas)}
+
+
+class BitsetMatcher:
+    """Проверка фраз по битовой маске словаря, сразу для пачки текстов.
+
+    Леммы каждого текста превращаются в булев вектор над словарём фраз. Фраза —
+    строка матрицы номеров её лемм, дополненная номером «всегда истинного» бита,
+    и входит в текст, если mask[phrase_lemmas].all(). Проверяются не все фразы,
+    а только те, чья опорная (самая редкая) лемма есть в тексте: как и в
+    ConceptIndex, фразы сгруппированы по опоре, но кандидаты всей пачки
+    собираются и сравниваются с масками одной векторной операцией.
+    """
+
+    __slots__ = (
+        "vocabulary", "concepts", "always_matched", "phrase_lemmas", "phrase_concepts", "anchor_offsets",
+    )
+
+    # Сколько байт масок допускается на один проход match_ids_many
+    CHUNK_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, normalized_synonyms, concepts=()):
+        self.concepts = list(concepts)
+        known = set(self.concepts)
+        self.concepts.extend(concept for concept in normalized_synonyms if concept not in known)
+        concept_ids = {concept: i for i, concept in enumerate(self.concepts)}
+
+        # Номера по возрастанию частоты: опорная лемма фразы — её наименьший номер
+        frequency = Counter()
+        for phrase_lemmas_list in normalized_synonyms.values():
+            for phrase_lemmas in phrase_lemmas_list:
+                frequency.update(phrase_lemmas)
+        ordered = sorted(frequency, key=lambda lemma: (frequency[lemma], lemma))
+        self.vocabulary = {lemma: i for i, lemma in enumerate(ordered)}
+        always_true = len(ordered)
+
+        always_matched = set()
+        phrases = set()
+        for concept, phrase_lemmas_list in normalized_synonyms.items():
+            for phrase_lemmas in phrase_lemmas_list:
+                if not phrase_lemmas:
+                    always_matched.add(concept_ids[concept])
+                    continue
+                phrases.add((tuple(sorted(self.vocabulary[lemma] for lemma in phrase_lemmas)), concept_ids[concept]))
+        self.always_matched = frozenset(always_matched)
+
+        phrases = sorted(phrases)
+        width = max((len(lemma_ids) for lemma_ids, _ in phrases), default=1)
+        self.phrase_lemmas = np.full((len(phrases), width), always_true, dtype=np.int32)
+        for p, (lemma_ids, _) in enumerate(phrases):
+            self.phrase_lemmas[p, :len(lemma_ids)] = lemma_ids
+        self.phrase_concepts = np.array([concept_id for _, concept_id in phrases], dtype=np.int64)
+        anchors = self.phrase_lemmas[:, 0]
+        self.anchor_offsets = np.searchsorted(anchors, np.arange(always_true + 1)).astype(np.int64)
+
+    @property
+    def phrase_count(self):
+        return len(self.phrase_lemmas)
+
+    def lemma_pairs(self, lemma_sets):
+        """Пары (номер текста, номер леммы) для лемм из словаря; остальные ни в одну фразу не входят."""
+        get = self.vocabulary.get
+        rows, columns = [], []
+        for row, lemmas in enumerate(lemma_sets):
+            ids = [i for i in map(get, lemmas) if i is not None]
+            columns.extend(ids)
+            rows.extend([row] * len(ids))
+        return np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64)
+
+    def match_ids_many(self, lemma_sets):
+        """Для каждого текста — множество номеров найденных концептов."""
+        chunk = max(1, self.CHUNK_BYTES // (len(self.vocabulary) + 1))
+        found = []
+        for start in range(0, len(lemma_sets), chunk):
+            chunk_sets = lemma_sets[start:start + chunk]
+            rows, lemmas = self.lemma_pairs(chunk_sets)
+
+            # Маска «текст × лемма словаря»; последний столбец всегда истинный
+            masks = np.zeros((len(chunk_sets), len(self.vocabulary) + 1), dtype=bool)
+            masks[:, -1] = True
+            masks[rows, lemmas] = True
+
+            # Пары (текст, фраза) для всех фраз, опорная лемма которых есть в тексте
+            first = self.anchor_offsets[lemmas]
+            counts = self.anchor_offsets[lemmas + 1] - first
+            rows = np.repeat(rows, counts)
+            phrases = np.arange(counts.sum()) + np.repeat(first - (np.cumsum(counts) - counts), counts)
+
+            # Фраза входит в текст, если выставлены биты всех её лемм
+            hits = masks[rows[:, None], self.phrase_lemmas[phrases]].all(axis=1)
+            pairs = np.unique(rows[hits] * len(self.concepts) + self.phrase_concepts[phrases[hits]])
+            bounds = np.searchsorted(pairs, np.arange(len(chunk_sets) + 1) * len(self.concepts)).tolist()
+            concept_ids = (pairs % len(self.concepts)).tolist()
+            found.extend(self.always_matched.union(concept_ids[a:b]) for a, b in zip(bounds[:-1], bounds[1:]))
+        return found
+
+    def match_ids(self, user_lemmas):
+        """Номера найденных концептов одного текста."""
+        return self.match_ids_many([user_lemmas])[0]
+
+    def match_many(self, lemma_sets):
+        """То же, что match, для списка текстов за один проход."""
+        concepts = self.concepts
+        return [{concepts[i] for i in ids} for ids in self.match_ids_many(lemma_sets)]
+
+    def match(self, user_lemmas):
+        """Возвращает то же множество концептов, что и scan_match."""
+        return self.match_many([user_lemmas])[0]
+
+
+class PhraseAutomaton:
+    """Автомат Ахо–Корасик над последовательностями лемм.
+
+    В отличие от проверки подмножества учитывает порядок и соседство слов:
+    фраза совпадает, только если её леммы идут в тексте подряд. Все вхождения
+    всех фраз находятся за один проход по лемматизированному тексту.
+    """
+
+    def __init__(self, phrase_sequences):
+        self.always_matched = set()
+        self.transitions = [{}]
+        self.outputs = [frozenset()]
+        for concept, sequences in phrase_sequences.items():
+            for sequence in sequences:
+                if not sequence:
+                    self.always_matched.add(concept)
+                    continue
+                state = 0
+                for lemma in sequence:
+                    next_state = self.transitions[state].get(lemma)
+                    if next_state is None:
+                        next_state = len(self.transitions)
+                        self.transitions[state][lemma] = next_state
+                        self.transitions.append({})
+                        self.outputs.append(frozenset())
+                    state = next_state
+                self.outputs[state] = self.outputs[state] | {concept}
+
+        # Суффиксные ссылки обходом в ширину; выходы наследуются по ним,
+        # чтобы фраза-суффикс находилась и внутри более длинной фразы
+        self.failures = [0] * len(self.transitions)
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for lemma, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                failure = self.failures[state]
+                while failure and lemma not in self.transitions[failure]:
+                    failure = self.failures[failure]
+                self.failures[next_state] = self.transitions[failure].get(lemma, 0)
+                self.outputs[next_state] = self.outputs[next_state] | self.outputs[self.failures[next_state]]
+
+    def match(self, lemma_sequence):
+        """Концепты, хотя бы одна фраза которых встречается в тексте подряд."""
+        matched_concepts = set(self.always_matched)
+        transitions = self.transitions
+        failures = self.failures
+        outputs = self.outputs
+        state = 0
+        for lemma in lemma_sequence:
+            while state and lemma not in transitions[state]:
+                state = failures[state]
+            state = transitions[state].get(lemma, 0)
+            if outputs[state]:
+                matched_concepts.update(outputs[state])
+        return matched_concepts
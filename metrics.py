@@ -0,0 +1,126 @@
+# Лёгкие счётчики и таймеры этапов анализа в формате Prometheus.
+# При выключенных метриках timer() возвращает общий пустой контекст,
+# а observe()/inc() сразу выходят — на горячем пути остаётся одна проверка флага.
+# Реестр у каждого процесса свой, поэтому все ряды помечены меткой pid: при
+# нескольких воркерах gunicorn /metrics отдаёт ряды того воркера, который ответил,
+# а суммировать их по воркерам нужно в запросе Prometheus (sum without (pid)).
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+TIME_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+_NULL_CONTEXT = nullcontext()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, label=None):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label = label
+        # значение метки → [счётчики по корзинам..., сумма, количество]
+        self._series = {}
+
+    def observe(self, value, label_value=None):
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series.setdefault(label_value, [0] * (len(self.buckets) + 2))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self, worker_labels=()):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_value, series in sorted(self._series.items(), key=lambda item: str(item[0])):
+            base = list(worker_labels) + ([(self.label, label_value)] if self.label else [])
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(base + [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(base + [('le', '+Inf')])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(base)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(base)} {series[-1]}")
+        return lines
+
+
+class Metrics:
+    """Реестр метрик одного процесса."""
+
+    def __init__(self, enabled=True, prefix="signsport"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = []
+
+    def histogram(self, name, help_text, buckets, label=None):
+        histogram = Histogram(f"{self.prefix}_{name}", help_text, buckets, label)
+        self._histograms[name] = histogram
+        return histogram
+
+    def counter(self, name, help_text):
+        self._counters[name] = [help_text, 0]
+
+    def gauge(self, name, help_text, callback):
+        """Значение вычисляется callback() в момент выдачи /metrics."""
+        self._gauges.append((f"{self.prefix}_{name}", help_text, callback))
+
+    def inc(self, name, value=1):
+        if self.enabled:
+            with self._lock:
+                self._counters[name][1] += value
+
+    def observe(self, name, value, label_value=None):
+        if self.enabled:
+            with self._lock:
+                self._histograms[name].observe(value, label_value)
+
+    def timer(self, stage):
+        """Контекст, записывающий длительность этапа в гистограмму stage_seconds."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _StageTimer(self, stage)
+
+    def render(self):
+        # pid берётся при выдаче, а не при создании реестра: он создаётся в мастере до fork
+        worker_labels = [("pid", os.getpid())]
+        worker = _format_labels(worker_labels)
+        lines = []
+        with self._lock:
+            for name, (help_text, value) in self._counters.items():
+                full_name = f"{self.prefix}_{name}"
+                lines += [f"# HELP {full_name} {help_text}", f"# TYPE {full_name} counter",
+                          f"{full_name}{worker} {value}"]
+            for histogram in self._histograms.values():
+                lines += histogram.render(worker_labels)
+        for full_name, help_text, callback in self._gauges:
+            lines += [f"# HELP {full_name} {help_text}", f"# TYPE {full_name} gauge",
+                      f"{full_name}{worker} {callback()}"]
+        return "\n".join(lines) + "\n"
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe("stage_seconds", time.perf_counter() - self.start, self.stage)
+        return False
@@ -0,0 +1,92 @@
+# Горячая перезагрузка правил (synonyms.py и sport_rules.py или RULES_PATH) без перезапуска воркеров.
+#
+# Новая база собирается в фоновом потоке (неизменённые фразы берутся из
+# текущей), затем одним присваиванием подменяет старую. Запросы, которые
+# уже начались, дорабатывают со старой базой.
+import logging
+import threading
+import time
+
+from knowledge_base import build_knowledge_base, compute_source_hash, save_knowledge_base
+
+logger = logging.getLogger(__name__)
+
+
+class RulesReloader:
+    def __init__(self, get_current, install):
+        self.get_current = get_current
+        self.install = install
+        self._lock = threading.Lock()
+        self._watcher = None
+        self.status = {
+            "in_progress": False,
+            "last_reload_at": None,
+            "last_duration_s": None,
+            "last_error": None,
+            "relemmatized_phrases": None,
+        }
+
+    def reload(self, on_installed=None):
+        """Пересобирает базу, если исходники изменились. False — если перезагрузка уже идёт.
+
+        on_installed(kb) вызывается после подмены базы (не вызывается, если правила
+        не изменились или не собрались).
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        self.status["in_progress"] = True
+        start = time.perf_counter()
+        try:
+            current = self.get_current()
+            source_hash = compute_source_hash()
+            if source_hash == current.source_hash:
+                return True
+            kb = build_knowledge_base(source_hash, previous=current)
+            try:
+                save_knowledge_base(kb)
+            except OSError as e:
+                logger.warning("Не удалось сохранить артефакт базы знаний: %s", e)
+            self.install(kb)
+            if on_installed is not None:
+                on_installed(kb)
+            self.status.update(
+                last_reload_at=time.time(),
+                last_duration_s=time.perf_counter() - start,
+                last_error=None,
+                relemmatized_phrases=kb.relemmatized_phrases,
+            )
+            logger.info("Правила перезагружены за %.2f с, заново лемматизировано фраз: %d",
+                        self.status["last_duration_s"], kb.relemmatized_phrases)
+            return True
+        except Exception as e:
+            # Ошибка в новых правилах не должна ронять сервис: остаётся старая база
+            logger.exception("Не удалось перезагрузить правила")
+            self.status["last_error"] = str(e)
+            return True
+        finally:
+            self.status["in_progress"] = False
+            self._lock.release()
+
+    def reload_in_background(self, on_installed=None):
+        """Запускает reload в отдельном потоке. False — если перезагрузка уже идёт."""
+        if self._lock.locked():
+            return False
+        threading.Thread(target=self.reload, args=(on_installed,), name="rules-reload", daemon=True).start()
+        return True
+
+    def watch(self, interval):
+        """Следит за исходниками и перезагружает правила при их изменении."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    if compute_source_hash() != self.get_current().source_hash:
+                        self.reload()
+                except OSError as e:
+                    logger.warning("Не удалось проверить исходники правил: %s", e)
+
+        self._watcher = threading.Thread(target=loop, name="rules-watcher", daemon=True)
+        self._watcher.start()
@@ -0,0 +1,219 @@
+"""Загрузка базы знаний (SYNONYM_GROUPS, SPORT_RULES и SCORE_MODIFIERS) из файлов данных.
+
+Поддерживаемые источники:
+    *.json     — {"synonym_groups": {...}, "sport_rules": {...}, "score_modifiers": [...]}
+    *.toml     — те же таблицы [synonym_groups], [sport_rules] и [[score_modifiers]]
+    *.msgpack  — то же в бинарном виде (нужен пакет msgpack)
+    без пути   — synonyms.py и sport_rules.py, разобранные через ast без импорта
+
+score_modifiers в файле данных необязателен: без него модификаторов нет.
+
+Повторяющиеся концепты не перетирают друг друга, как в литерале dict,
+а сливаются: списки фраз объединяются, словари — по ключам.
+
+Экспорт текущих модулей в файл данных и проверка файла:
+    python rules_loader.py export data/rules.json
+    python rules_loader.py check data/rules.json
+"""
+import ast
+import json
+import logging
+import os
+import sys
+import tomllib
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PYTHON_SOURCES = (
+    (os.path.join(BASE_DIR, "synonyms.py"), "SYNONYM_GROUPS"),
+    (os.path.join(BASE_DIR, "sport_rules.py"), "SPORT_RULES"),
+    (os.path.join(BASE_DIR, "sport_rules.py"), "SCORE_MODIFIERS"),
+)
+
+
+class RulesError(ValueError):
+    """Файл правил не удалось разобрать или он не соответствует формату."""
+
+
+def merge_values(old, new, path):
+    """Сливает значения повторяющегося ключа: списки — без дублей, словари — рекурсивно."""
+    if isinstance(old, list) and isinstance(new, list):
+        return old + [item for item in new if item not in old]
+    if isinstance(old, dict) and isinstance(new, dict):
+        merged = dict(old)
+        for key, value in new.items():
+            merged[key] = merge_values(merged[key], value, f"{path}/{key}") if key in merged else value
+        return merged
+    if old != new:
+        logger.warning("Повторяющийся ключ %s: значение %r заменено на %r", path, old, new)
+    return new
+
+
+def merge_pairs(pairs):
+    """object_pairs_hook для json: повторяющиеся ключи сливаются, а не перетираются."""
+    result = {}
+    for key, value in pairs:
+        result[key] = merge_values(result[key], value, key) if key in result else value
+    return result
+
+
+def _literal_with_merge(node, path=""):
+    if isinstance(node, ast.Dict):
+        result = {}
+        for key_node, value_node in zip(node.keys, node.values):
+            if key_node is None:
+                raise RulesError(f"{path}: распаковка ** не поддерживается")
+            key = ast.literal_eval(key_node)
+            value = _literal_with_merge(value_node, f"{path}/{key}")
+            result[key] = merge_values(result[key], value, f"{path}/{key}") if key in result else value
+        return result
+    return ast.literal_eval(node)
+
+
+def load_python_literal(path, name):
+    """Значение NAME = {...} из файла, без импорта модуля и с слиянием повторов."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for statement in tree.body:
+        if isinstance(statement, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == name for target in statement.targets
+        ):
+            try:
+                return _literal_with_merge(statement.value, name)
+            except ValueError as e:
+                raise RulesError(f"{path}: {name} должен быть литералом: {e}") from e
+    raise RulesError(f"{path}: не найдено присваивание {name}")
+
+
+def rules_source_paths(path=None):
+    """Файлы, из которых собирается база (для хэша и слежения за изменениями)."""
+    return [path] if path else list(dict.fromkeys(source for source, _ in PYTHON_SOURCES))
+
+
+def read_rules_file(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path, encoding="utf-8") as f:
+            try:
+                return json.load(f, object_pairs_hook=merge_pairs)
+            except ValueError as e:
+                raise RulesError(f"{path}: {e}") from e
+    if extension == ".toml":
+        with open(path, "rb") as f:
+            try:
+                return tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise RulesError(f"{path}: {e}") from e
+    if extension == ".msgpack":
+        try:
+            import msgpack
+        except ImportError as e:
+            raise RulesError("Для файлов .msgpack нужен пакет msgpack (pip install msgpack)") from e
+        with open(path, "rb") as f:
+            try:
+                return msgpack.unpackb(f.read(), raw=False, strict_map_key=False)
+            except ValueError as e:
+                raise RulesError(f"{path}: {e}") from e
+    raise RulesError(f"{path}: неизвестный формат {extension!r} (ожидается .json, .toml или .msgpack)")
+
+
+def is_integer(value):
+    # Баллы считаются в целочисленных матрицах SportScorer: дробный вес там молча обрезался бы
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def is_string_list(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def check_structure(synonym_groups, sport_rules, score_modifiers=()):
+    """Проверяет типы; при нарушении — RulesError, потому что с такими данными анализ не собрать."""
+    if not isinstance(synonym_groups, dict):
+        raise RulesError("synonym_groups должен быть словарём «концепт → список фраз»")
+    for concept, phrases in synonym_groups.items():
+        if not isinstance(phrases, list) or not all(isinstance(phrase, str) for phrase in phrases):
+            raise RulesError(f"synonym_groups[{concept!r}] должен быть списком строк")
+
+    if not isinstance(sport_rules, dict):
+        raise RulesError("sport_rules должен быть словарём «вид спорта → правило»")
+    for sport, rule in sport_rules.items():
+        if not isinstance(rule, dict):
+            raise RulesError(f"sport_rules[{sport!r}] должен быть словарём")
+        keywords = rule.get("keywords", {})
+        if not isinstance(keywords, dict) or not all(is_integer(weight) for weight in keywords.values()):
+            raise RulesError(f"sport_rules[{sport!r}].keywords должен быть словарём «концепт → целый вес»")
+
+    if not isinstance(score_modifiers, (list, tuple)):
+        raise RulesError("score_modifiers должен быть списком модификаторов")
+    for i, modifier in enumerate(score_modifiers):
+        if not isinstance(modifier, dict):
+            raise RulesError(f"score_modifiers[{i}] должен быть словарём")
+        when = modifier.get("when")
+        if not is_string_list(when) or not when:
+            raise RulesError(f"score_modifiers[{i}].when должен быть непустым списком концептов")
+        if not is_string_list(modifier.get("unless", [])):
+            raise RulesError(f"score_modifiers[{i}].unless должен быть списком концептов")
+        if modifier.get("sport") not in sport_rules:
+            raise RulesError(f"score_modifiers[{i}] ссылается на неизвестный вид спорта {modifier.get('sport')!r}")
+        if not is_integer(modifier.get("delta")):
+            raise RulesError(f"score_modifiers[{i}].delta должен быть целым числом")
+
+
+def load_rules(path=None):
+    """Возвращает (synonym_groups, sport_rules, score_modifiers) из файла данных или из модулей Python."""
+    if path:
+        data = read_rules_file(path)
+        if not isinstance(data, dict):
+            raise RulesError(f"{path}: ожидается объект с synonym_groups и sport_rules")
+        synonym_groups = data.get("synonym_groups")
+        sport_rules = data.get("sport_rules")
+        score_modifiers = data.get("score_modifiers", [])
+    else:
+        synonym_groups, sport_rules, score_modifiers = (
+            load_python_literal(source, name) for source, name in PYTHON_SOURCES
+        )
+
+    # Несостыковки между синонимами и правилами ищет rules_report при сборке базы
+    check_structure(synonym_groups, sport_rules, score_modifiers)
+    return synonym_groups, sport_rules, score_modifiers
+
+
+def export_rules(path, synonym_groups, sport_rules, score_modifiers=()):
+    data = {"synonym_groups": synonym_groups, "sport_rules": sport_rules, "score_modifiers": list(score_modifiers)}
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".msgpack":
+        import msgpack
+
+        with open(path, "wb") as f:
+            f.write(msgpack.packb(data, use_bin_type=True))
+    elif extension == ".json":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    else:
+        raise RulesError(f"Экспорт поддерживается только в .json и .msgpack, не {extension!r}")
+
+
+def main(argv):
+    if len(argv) < 2 or argv[0] not in ("export", "check"):
+        print(__doc__)
+        return 2
+    command, path = argv[0], argv[1]
+    if command == "export":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        export_rules(path, *load_rules())
+        print(f"Правила записаны в {path}")
+        return 0
+
+    from lemmatizer import normalize_phrase
+    from rules_report import build_report, format_report
+
+    synonym_groups, sport_rules, score_modifiers = load_rules(path)
+    for line in format_report(build_report(synonym_groups, sport_rules, normalize_phrase, score_modifiers)):
+        print(line)
+    print(f"Концептов: {len(synonym_groups)}, видов спорта: {len(sport_rules)}, модификаторов: {len(score_modifiers)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,136 @@
+"""
+Отчёт о согласованности базы знаний.
+
+Ищет в SYNONYM_GROUPS, SPORT_RULES и SCORE_MODIFIERS то, что не ломает
+загрузку, но тихо портит результаты:
+    * концепты из SPORT_RULES без группы синонимов — их вес никогда не сработает;
+    * группы синонимов, которые не нужны ни одному виду спорта и ни одному модификатору;
+    * концепты модификаторов без группы синонимов;
+    * почти одинаковые имена концептов («потребность_в_одобрении» и
+      «потребность в одобрении») — обычно это опечатка, из-за которой
+      правило и модификатор смотрят на разные концепты;
+    * фразы, которые после лемматизации совпадают в разных концептах;
+    * фразы без русских слов — они срабатывают на любой текст;
+    * max_score, не совпадающий с суммой весов (сейчас уверенность считается от суммы).
+
+Отчёт пишется в лог при сборке базы знаний и доступен как kb.report.
+Ручной запуск: python rules_report.py [путь к файлу правил]
+"""
+import sys
+
+from scoring import modifier_concepts
+
+
+def concept_key(concept):
+    """Имя концепта без различий в регистре, подчёркиваниях и «ё»."""
+    return " ".join(concept.lower().replace("ё", "е").replace("_", " ").split())
+
+
+def keyword_concepts(sport_rules):
+    """Концепт → виды спорта, в ключевых словах которых он встречается."""
+    sports_by_concept = {}
+    for sport, rule in sport_rules.items():
+        for concept in rule.get("keywords", {}):
+            sports_by_concept.setdefault(concept, []).append(sport)
+    return sports_by_concept
+
+
+def live_concepts(synonym_groups, sport_rules, score_modifiers=()):
+    """Группы синонимов, которые влияют на результат: есть в весах или в модификаторах."""
+    used = set(keyword_concepts(sport_rules)) | set(modifier_concepts(score_modifiers))
+    return [concept for concept in synonym_groups if concept in used]
+
+
+def build_report(synonym_groups, sport_rules, normalize, score_modifiers=()):
+    """Собирает найденные несостыковки в словарь списков.
+
+    normalize(phrase) должна возвращать множество лемм фразы.
+    """
+    sports_by_concept = keyword_concepts(sport_rules)
+    modifier_names = set(modifier_concepts(score_modifiers))
+
+    missing_groups = [
+        (concept, sports) for concept, sports in sports_by_concept.items() if concept not in synonym_groups
+    ]
+    unused_groups = [
+        concept for concept in synonym_groups if concept not in sports_by_concept and concept not in modifier_names
+    ]
+    missing_modifier_groups = sorted(modifier_names - set(synonym_groups))
+
+    names_by_key = {}
+    for concept in list(synonym_groups) + list(sports_by_concept) + sorted(modifier_names):
+        names = names_by_key.setdefault(concept_key(concept), [])
+        if concept not in names:
+            names.append(concept)
+    similar_names = [names for names in names_by_key.values() if len(names) > 1]
+
+    concepts_by_phrase = {}
+    always_matched = []
+    for concept, phrases in synonym_groups.items():
+        for phrase in phrases:
+            lemmas = frozenset(normalize(phrase))
+            if not lemmas:
+                always_matched.append((concept, phrase))
+                continue
+            concepts = concepts_by_phrase.setdefault(lemmas, [])
+            if concept not in concepts:
+                concepts.append(concept)
+    duplicate_phrases = [
+        (" ".join(sorted(lemmas)), concepts) for lemmas, concepts in concepts_by_phrase.items() if len(concepts) > 1
+    ]
+
+    max_score_mismatches = []
+    for sport, rule in sport_rules.items():
+        declared = rule.get("max_score")
+        total = sum(rule.get("keywords", {}).values())
+        if declared is not None and declared != total:
+            max_score_mismatches.append((sport, declared, total))
+
+    return {
+        "missing_groups": missing_groups,
+        "unused_groups": unused_groups,
+        "missing_modifier_groups": missing_modifier_groups,
+        "similar_names": similar_names,
+        "duplicate_phrases": duplicate_phrases,
+        "always_matched": always_matched,
+        "max_score_mismatches": max_score_mismatches,
+    }
+
+
+def format_report(report, duplicates=True):
+    """Отчёт в виде строк для лога или консоли.
+
+    Повторы фраз между концептами часто намеренные, поэтому их можно не выводить.
+    """
+    lines = []
+    for concept, sports in report["missing_groups"]:
+        lines.append(f"Концепт {concept!r} из SPORT_RULES не имеет группы синонимов ({', '.join(sports)})")
+    for concept in report["unused_groups"]:
+        lines.append(f"Группа синонимов {concept!r} не используется ни в одном виде спорта")
+    for concept in report["missing_modifier_groups"]:
+        lines.append(f"Концепт {concept!r} из SCORE_MODIFIERS не имеет группы синонимов")
+    for names in report["similar_names"]:
+        lines.append("Похожие имена концептов: " + ", ".join(repr(name) for name in names))
+    for lemmas, concepts in report["duplicate_phrases"] if duplicates else ():
+        lines.append(f"Фраза {lemmas!r} повторяется в концептах: " + ", ".join(repr(c) for c in concepts))
+    for concept, phrase in report["always_matched"]:
+        lines.append(f"Фраза {phrase!r} концепта {concept!r} без русских слов и срабатывает всегда")
+    for sport, declared, total in report["max_score_mismatches"]:
+        lines.append(f"{sport}: max_score {declared}, а сумма весов {total}")
+    return lines
+
+
+def main(argv):
+    from lemmatizer import normalize_phrase
+    from rules_loader import load_rules
+
+    synonym_groups, sport_rules, score_modifiers = load_rules(argv[0] if argv else None)
+    lines = format_report(build_report(synonym_groups, sport_rules, normalize_phrase, score_modifiers))
+    for line in lines:
+        print(line)
+    print(f"Замечаний: {len(lines)}")
+    return 1 if lines else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
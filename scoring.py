@@ -0,0 +1,147 @@
+# Векторизованный подсчёт баллов: матрица весов «концепт × вид спорта»
+import heapq
+
+import numpy as np
+
+# Границы уверенности в процентах
+MIN_CONFIDENCE = 50
+MAX_CONFIDENCE = 95
+
+
+def modifier_concepts(score_modifiers):
+    """Концепты, от которых зависят модификаторы (when и unless)."""
+    concepts = []
+    for modifier in score_modifiers:
+        for concept in modifier["when"] + modifier.get("unless", []):
+            if concept not in concepts:
+                concepts.append(concept)
+    return concepts
+
+
+class SportScorer:
+    """Веса из SPORT_RULES и модификаторы SCORE_MODIFIERS, собранные в матрицы:
+    баллы считаются одним умножением, поправки — ещё тремя, сколько бы модификаторов ни было."""
+
+    def __init__(self, sport_rules, reachable=None, score_modifiers=()):
+        """reachable — концепты, которые вообще могут найтись в тексте; остальные
+        не получают столбца в матрице, но по-прежнему входят в max_scores."""
+        self.sports = list(sport_rules)
+        self.sport_ids = {sport: i for i, sport in enumerate(self.sports)}
+        self.reasons = [rule.get("reason", "") for rule in sport_rules.values()]
+
+        self.concepts = []
+        self.concept_ids = {}
+        keyword_concepts = [concept for rule in sport_rules.values() for concept in rule.get("keywords", {})]
+        # Концепты модификаторов получают столбцы даже без весов — по ним проверяются условия
+        for concept in keyword_concepts + modifier_concepts(score_modifiers):
+            if reachable is not None and concept not in reachable:
+                continue
+            if concept not in self.concept_ids:
+                self.concept_ids[concept] = len(self.concepts)
+                self.concepts.append(concept)
+
+        self.weights = np.zeros((len(self.concepts), len(self.sports)), dtype=np.int64)
+        self.max_scores = np.ones(len(self.sports), dtype=np.int64)
+        for j, rule in enumerate(sport_rules.values()):
+            keywords = rule.get("keywords", {})
+            for concept, weight in keywords.items():
+                if concept in self.concept_ids:
+                    self.weights[self.concept_ids[concept], j] = weight
+            if keywords:
+                self.max_scores[j] = sum(keywords.values())
+
+        # Модификатор с недостижимым концептом в when не сработает никогда и не компилируется;
+        # недостижимый концепт в unless никогда не мешает и просто опускается
+        modifiers = [
+            modifier for modifier in score_modifiers
+            if all(concept in self.concept_ids for concept in modifier["when"])
+        ]
+        self.modifier_required = np.zeros((len(self.concepts), len(modifiers)), dtype=np.int64)
+        self.modifier_excluded = np.zeros((len(self.concepts), len(modifiers)), dtype=np.int64)
+        self.modifier_counts = np.zeros(len(modifiers), dtype=np.int64)
+        self.modifier_deltas = np.zeros((len(modifiers), len(self.sports)), dtype=np.int64)
+        for m, modifier in enumerate(modifiers):
+            required = {self.concept_ids[concept] for concept in modifier["when"]}
+            excluded = {self.concept_ids[c] for c in modifier.get("unless", []) if c in self.concept_ids}
+            self.modifier_required[list(required), m] = 1
+            self.modifier_excluded[list(excluded), m] = 1
+            self.modifier_counts[m] = len(required)
+            self.modifier_deltas[m, self.sport_ids[modifier["sport"]]] += modifier["delta"]
+
+    def concept_matrix(self, concept_sets):
+        """Бинарная матрица «запрос × концепт»; концепты вне весов и модификаторов отбрасываются."""
+        matrix = np.zeros((len(concept_sets), len(self.concepts)), dtype=np.int64)
+        concept_ids = self.concept_ids
+        for i, concepts in enumerate(concept_sets):
+            columns = [concept_ids[c] for c in concepts if c in concept_ids]
+            matrix[i, columns] = 1
+        return matrix
+
+    def id_matrix(self, id_sets):
+        """То же по номерам концептов из match_ids; номера за пределами столбцов отбрасываются."""
+        matrix = np.zeros((len(id_sets), len(self.concepts)), dtype=np.int64)
+        width = len(self.concepts)
+        for i, ids in enumerate(id_sets):
+            matrix[i, [j for j in ids if j < width]] = 1
+        return matrix
+
+    def score(self, concept_matrix):
+        """Баллы «запрос × вид спорта»."""
+        return concept_matrix @ self.weights
+
+    def modify(self, concept_matrix, scores):
+        """Баллы с поправками сработавших модификаторов.
+
+        Срабатывание всех модификаторов для всех запросов — два умножения
+        и сравнение, сумма поправок — третье умножение. Баллы, к которым
+        применена ненулевая поправка, не опускаются ниже нуля.
+        """
+        active = (concept_matrix @ self.modifier_required == self.modifier_counts) & (
+            concept_matrix @ self.modifier_excluded == 0
+        )
+        adjustments = active.astype(np.int64) @ self.modifier_deltas
+        modified = scores + adjustments
+        np.maximum(modified, 0, out=modified, where=adjustments != 0)
+        return modified
+
+    def confidences(self, scores):
+        """Уверенность в процентах: доля от максимума, обрезанная до [50, 95]."""
+        percent = np.trunc((scores / self.max_scores) * 100)
+        return np.clip(percent, MIN_CONFIDENCE, MAX_CONFIDENCE).astype(np.int64)
+
+    def rank(self, scores, confidences, top_n=3):
+        """Для каждого запроса — до top_n индексов видов спорта с положительным баллом.
+
+        Порядок: уверенность по убыванию, затем балл по убыванию, затем порядок SPORT_RULES.
+        Выбор через heapq.nsmallest: полная сортировка всех видов спорта не нужна.
+        """
+        rankings = []
+        for row_scores, row_confidences in zip(scores.tolist(), confidences.tolist()):
+            candidates = [
+                (-confidence, -score, j)
+                for j, (score, confidence) in enumerate(zip(row_scores, row_confidences))
+                if score > 0
+            ]
+            rankings.append([j for _, _, j in heapq.nsmallest(top_n, candidates)])
+        return rankings
+
+    def explain(self, concept_row, base_row, score_row, confidence_row, ranked):
+        """Из чего сложились баллы видов спорта ranked: веса найденных концептов и поправки модификаторов.
+
+        Все строки берутся из того же прохода, что и сам ответ, — повторного поиска нет.
+        """
+        matched = np.flatnonzero(concept_row)
+        explanation = []
+        for j in ranked:
+            weights = self.weights[matched, j]
+            explanation.append({
+                "sport": self.sports[j],
+                "score": int(score_row[j]),
+                "max_score": int(self.max_scores[j]),
+                "confidence": int(confidence_row[j]),
+                "concepts": {
+                    self.concepts[i]: int(weight) for i, weight in zip(matched, weights) if weight
+                },
+                "modifiers": int(score_row[j] - base_row[j]),
+            })
+        return explanation
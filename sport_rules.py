@@ -153,4 +153,12 @@ SPORT_RULES = {
             "решительность": 2
         },
     },
-}
\ No newline at end of file
+}
+# Модификаторы баллов поверх весов SPORT_RULES. Модификатор срабатывает, если
+# в тексте нашлись все концепты when и ни одного из unless (необязательно),
+# и добавляет delta к баллу вида спорта sport: отрицательная delta — штраф,
+# положительная — бонус. Поправки сработавших модификаторов складываются,
+# и балл, к которому применена поправка, не опускается ниже нуля.
+SCORE_MODIFIERS = [
+    {"when": ["потребность_в_одобрении"], "sport": "Плавание🏊", "delta": -15},
+]
@@ -0,0 +1,20 @@
+# Точка входа для продакшен-сервера: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# С preload_app модуль импортируется один раз в мастер-процессе до fork,
+# поэтому при WARM_UP_MODE=eager база знаний и словари pymorphy3 загружаются
+# один раз, а воркеры получают их через copy-on-write. В режиме background
+# каждый воркер прогревается сам после fork (см. gunicorn.conf.py).
+import gc
+
+from app import app, warm_up_worker
+from config import WARM_UP_MODE
+
+if WARM_UP_MODE == "eager":
+    warm_up_worker()
+
+# Переносим всё загруженное в «постоянное» поколение: сборщик мусора в воркерах
+# не будет трогать эти объекты, и страницы памяти не начнут копироваться.
+gc.collect()
+gc.freeze()
+
+__all__ = ["app"]